@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark libs/sublibs/csv2mid.py, event objects against compact records.
+
+usage: PYTHONPATH=src python benchmarks/bench_csv2mid.py [notes]
+"""
+
+import csv
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from audioworkstation.libs.sublibs import csv2mid as C2M
+
+TRACKS = 15
+
+
+def generate_csv(csvfile: Path, notes: int) -> None:
+    """Write a CSV score of notes spread over 15 tracks.
+
+    :param Path csvfile: output file
+    :param int notes: number of "Note On"
+    """
+    rows = [
+        ["Sequencer", "0", "0", "Meta Event", "Set Tempo", "500000"],
+        ["Sequencer", "0", "0", "Meta Event", "Time Signature", "4", "2", "24", "8"],
+    ]
+    for i in range(notes):
+        channel = i % TRACKS
+        rows += [
+            [
+                f"Track{channel}",
+                str(i // (TRACKS * 4)),
+                str(i // TRACKS % 4 * 480),
+                "Midi Event",
+                "Note On",
+                str(channel),
+                str(40 + i % 40),
+                "0x40",
+                "400",
+            ]
+        ]
+    last_bar = str(notes // (TRACKS * 4) + 1)
+    for name in ["Sequencer"] + [f"Track{i}" for i in range(TRACKS)]:
+        rows += [[name, last_bar, "0", "Meta Event", "End Of Track"]]
+    with csvfile.open("w", newline="") as f:
+        csv.writer(f, dialect="unix").writerows(rows)
+
+
+def load(csvfile: Path, records: bool) -> list:
+    """Load all events as event objects or records.
+
+    :return: events
+    """
+    with csvfile.open() as f:
+        events = [C2M.event_data(line) for line in csv.reader(f, dialect="unix")]
+    return [ev.record() for ev in events] if records else events
+
+
+def measure(csvfile: Path, records: bool) -> tuple:
+    """Memory kept by the loaded events, and time to sort them shuffled.
+
+    :return: bytes, seconds
+    """
+    tracemalloc.start()
+    events = load(csvfile, records)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    random.Random(0).shuffle(events)
+    start = perf_counter()
+    if records:
+        events.sort(key=C2M.EventRecord.key)
+    else:
+        events.sort()
+    return (memory, perf_counter() - start)
+
+
+def main(notes: int) -> None:
+    with TemporaryDirectory() as tmpdir:
+        csvfile = Path(tmpdir, "score.csv")
+        generate_csv(csvfile, notes)
+        print(f"{notes} notes")
+        for records in (False, True):
+            memory, seconds = measure(csvfile, records)
+            name = "records" if records else "events"
+            print(f"{name:>8}: {memory / 2**20:.1f} MiB kept, sort {seconds:.3f} s")
+        start = perf_counter()
+        C2M.generate(csvfile=str(csvfile), midifile=str(Path(tmpdir, "score.mid")))
+        print(f"generate: {perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
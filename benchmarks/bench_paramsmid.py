@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark decoding of libs/sublibs/paramsmid.py, pure Python and compiled.
+
+The compiled path is used when the extension built by setup/compile.py is
+found next to paramsmid.py, the pure Python path is always loaded from source.
+
+usage: PYTHONPATH=src python benchmarks/bench_paramsmid.py [events per track]
+"""
+
+import importlib.util
+import struct
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from audioworkstation.libs.sublibs import paramsmid as PMID
+
+TRACKS = 16
+REPEAT = 3
+
+
+def generate(midifile: Path, events: int) -> int:
+    """Write a SMF of 16 tracks of note on/off pairs with running status.
+
+    :param Path midifile: output file
+    :param int events: MIDI events per track
+    :return: number of events in the file
+    """
+    chunks = [struct.pack(">4sLHHH", b"MThd", 6, 1, TRACKS, 480)]
+    for channel in range(TRACKS):
+        track = bytearray(b"\x00\xff\x03\x05track")
+        track += bytes((0x00, 0xC0 | channel, channel))
+        track += bytes((0x00, 0x90 | channel, 60, 64))
+        for i in range(events // 2 - 1):
+            note = 36 + i % 48
+            track += bytes((0x83, 0x60, note, 0))  # running status, delta 480
+            track += bytes((0x00, note + 1, 64))
+        track += b"\x00\xff\x2f\x00"
+        chunks += [struct.pack(">4sL", b"MTrk", len(track)), bytes(track)]
+    midifile.write_bytes(b"".join(chunks))
+    return TRACKS * (events + 3)
+
+
+def pure_python():
+    """Load paramsmid from source, ignoring the compiled extension."""
+    spec = importlib.util.spec_from_file_location(
+        "paramsmid_py", Path(PMID.__file__).with_name("paramsmid.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(function, events: int) -> float:
+    """Best of REPEAT runs.
+
+    :return: events per second
+    """
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return events / best
+
+
+def main(events: int) -> None:
+    modules = {"pure python": pure_python()}
+    if PMID.COMPILED:
+        modules["compiled"] = PMID
+    else:
+        print("compiled extension not found, run setup/compile.py")
+
+    with TemporaryDirectory() as tmpdir:
+        midifile = Path(tmpdir, "large.mid")
+        total = generate(midifile, events)
+        print(f"{midifile.stat().st_size} bytes, {total} events")
+        for name, module in modules.items():
+            results = {
+                "list": measure(lambda: module.StandardMidiFile(midifile), total),
+                "columnar": measure(
+                    lambda: module.StandardMidiFile(midifile, columnar=True), total
+                ),
+                "scan_metadata": measure(
+                    lambda: module.scan_metadata(midifile), total
+                ),
+            }
+            rates = [f"{mode} {rate:,.0f} events/s" for mode, rate in results.items()]
+            print(f"{name:>12}: " + ", ".join(rates))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
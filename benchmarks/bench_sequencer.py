@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark note scheduling of libs/audio/fluidsynth.py Sequencer.
+
+Sequencer.note_at() makes, sends and deletes an event per note, and
+Sequencer.notes_at() sends all notes through one event. The notes are
+scheduled a minute ahead and dropped with the sequencer, nothing sounds.
+
+usage: PYTHONPATH=src python benchmarks/bench_sequencer.py [notes]
+"""
+
+import sys
+from time import perf_counter
+
+from audioworkstation.libs.audio import fluidsynth as FS
+
+REPEAT = 3
+#: dict: render to nowhere
+OVERRIDES = {"audio.driver": "file", "audio.file.name": "/dev/null"}
+
+
+def pattern(start: int, notes: int) -> list:
+    """A dense drum pattern, a note every 30 ticks.
+
+    :param int start: first tick
+    :param int notes: number of notes
+    :return: (ticks, channel, key number, velocity, duration) of each note
+    """
+    return [(start + i * 30, 9, 35 + i % 12, 64 + i % 64, 20) for i in range(notes)]
+
+
+def measure(schedule, notes: int) -> float:
+    """Best of REPEAT runs, each on a new sequencer.
+
+    :return: notes per second
+    """
+    best = float("inf")
+    for _ in range(REPEAT):
+        sfs = FS.Sequencer(overrides=OVERRIDES)
+        rows = pattern(sfs.tick + int(60 * sfs.time_scale), notes)
+        start = perf_counter()
+        schedule(sfs, rows)
+        best = min(best, perf_counter() - start)
+        del sfs
+    return notes / best
+
+
+def one_by_one(sfs: FS.Sequencer, rows: list) -> None:
+    for row in rows:
+        sfs.note_at(*row)
+
+
+def batch(sfs: FS.Sequencer, rows: list) -> None:
+    sfs.notes_at(rows)
+
+
+def main(notes: int) -> None:
+    print(f"{notes} notes")
+    for name, schedule in (("note_at", one_by_one), ("notes_at", batch)):
+        print(f"{name:>9}: {measure(schedule, notes):,.0f} notes/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
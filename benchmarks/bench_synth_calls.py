@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark per-call overhead of the hot Synthesizer methods.
+
+Each method is timed against the keyword call of its _prototype() function
+with a ctypes object per argument, the path used before the fast bindings.
+No audio driver is made, so nothing sounds. Note on/off needs a preset, it
+is measured only when a soundfont is given.
+
+usage: PYTHONPATH=src python benchmarks/bench_synth_calls.py [calls [soundfont]]
+"""
+
+import ctypes as CFS
+import sys
+from time import perf_counter
+
+from audioworkstation.libs.audio import fluidsynth as FS
+
+REPEAT = 5
+
+
+def measure(call, calls: int) -> float:
+    """Best of REPEAT runs.
+
+    :return: nanoseconds per call
+    """
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = perf_counter()
+        for i in range(calls):
+            call(i & 0x7F)
+        best = min(best, perf_counter() - start)
+    return best / calls * 1e9
+
+
+def main(calls: int, soundfont: list) -> None:
+    synth = FS.Synthesizer(soundfont=soundfont)
+    handle = synth._synth
+
+    def keyword_note(key: int) -> None:
+        FS.fluid_synth_noteon(
+            synth=CFS.c_void_p(handle),
+            chan=CFS.c_int(0),
+            key=CFS.c_int(key),
+            vel=CFS.c_int(1),
+        )
+        FS.fluid_synth_noteoff(
+            synth=CFS.c_void_p(handle), chan=CFS.c_int(0), key=CFS.c_int(key)
+        )
+
+    def fast_note(key: int) -> None:
+        synth.note_on(0, key, 1)
+        synth.note_off(0, key)
+
+    def keyword_cc(value: int) -> None:
+        FS.fluid_synth_cc(
+            synth=CFS.c_void_p(handle),
+            chan=CFS.c_int(0),
+            num=CFS.c_int(0x0B),
+            val=CFS.c_int(value),
+        )
+
+    def keyword_pitch_bend(value: int) -> None:
+        FS.fluid_synth_pitch_bend(
+            synth=CFS.c_void_p(handle), chan=CFS.c_int(0), val=CFS.c_int(value)
+        )
+
+    pairs = {
+        "cc": (keyword_cc, lambda value: synth.expression(0, value)),
+        "pitch_bend": (keyword_pitch_bend, lambda value: synth.pitch_bend(0, value)),
+    }
+    if soundfont:
+        pairs["note on+off"] = (keyword_note, fast_note)
+    print(f"{calls} calls")
+    for name, (keyword, fast) in pairs.items():
+        before, after = measure(keyword, calls), measure(fast, calls)
+        print(f"{name:>11}: {before:,.0f} ns -> {after:,.0f} ns per call")
+    del synth
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, sys.argv[2:3])
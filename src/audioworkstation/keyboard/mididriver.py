@@ -6,6 +6,7 @@ from time import sleep
 from json import load
 
 from ..libs.audio import fluidsynth as FS
+from ..libs.sublibs import paramsf2 as PSF2
 from ..libs.sublibs.parts import gain2dB, dB2gain
 
 
@@ -19,11 +20,16 @@ class MidiSoundModule:
 
     def __init__(self) -> None:
         with open("config/screen.json", "rt") as f:
-            kwargs = load(f)["keyboard"]
+            screen = load(f)
 
-        self.fsmdrv = FS.MidiDriver(**kwargs)
+        engine = FS.engine(**screen["engine"])
+        self.fsmdrv = FS.MidiDriver(**screen["keyboard"], engine=engine)
 
-        self.gm_sound_set, self.gm_percussion_sound_set = self.fsmdrv.gm_sound_set()
+        # read from the files, the same as self.fsmdrv.gm_sound_set()
+        index = PSF2.PresetIndex()
+        self.gm_sound_set, self.gm_percussion_sound_set = index.gm_sound_set(
+            self.fsmdrv.soundfonts
+        )
 
     @property
     def volume(self) -> int:
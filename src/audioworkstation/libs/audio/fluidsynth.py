@@ -12,11 +12,13 @@ Module 'concurrent.futures.ThreadPoolExecutor' is recommended.
 from typing import Union, Callable, Any
 from enum import IntEnum, IntFlag, auto
 from json import load
-from time import sleep
+from math import sqrt
+from time import perf_counter, sleep
 from ctypes.util import find_library
 import logging as LFS
 import ctypes as CFS
 from pathlib import Path
+from weakref import WeakValueDictionary
 
 # Logger
 logger = LFS.getLogger(__name__)
@@ -80,6 +82,28 @@ def _prototype(restype: Any, name: str, *params: tuple) -> Any:
         return None
 
 
+def _fastprototype(restype: Any, name: str, *argtypes: Any) -> Any:
+    """Returns a foreign function for hot paths, called positionally only.
+
+    Unlike :func:`_prototype` no paramflags are matched against keyword
+    arguments, and plain int arguments are converted by argtypes.
+
+    :param Any restype: foreign function restype
+    :param str name: foreign function name
+    :param Any argtypes: type of each argument
+
+    :return: foreign function object, checked by _errcheck
+    """
+    if hasattr(_libfs, name):
+        func = _libfs[name]  # a new object, not the one cached by _libfs
+        func.restype = restype
+        func.argtypes = argtypes
+        func.errcheck = _errcheck
+        return func
+    else:
+        return None
+
+
 # Audio output
 # Audio output - Audio driver
 # [API prototype]
@@ -101,6 +125,19 @@ fluid_audio_driver_register = _prototype(
 fluid_audio_driver_register.errcheck = _errcheck
 
 # Audio output - File Renderer
+# [API prototype]
+new_fluid_file_renderer = _prototype(
+    CFS.c_void_p, "new_fluid_file_renderer", (CFS.c_void_p, 1, "synth")
+)
+
+delete_fluid_file_renderer = _prototype(
+    None, "delete_fluid_file_renderer", (CFS.c_void_p, 1, "dev")
+)
+
+fluid_file_renderer_process_block = _prototype(
+    CFS.c_int, "fluid_file_renderer_process_block", (CFS.c_void_p, 1, "dev")
+)
+fluid_file_renderer_process_block.errcheck = _errcheck
 
 # Command Interface
 # Command Interface - Command Handler
@@ -436,6 +473,56 @@ fluid_midi_router_add_rule = _prototype(
 )
 fluid_midi_router_add_rule.errcheck = _errcheck
 
+# MIDI Input - MIDI Events
+# [user defined data type]
+
+
+class MidiEventData(CFS.Structure):
+    """Layout of fluid_midi_event_t, read-only by the playback handler.
+
+    Not a public type of FluidSynth, but the same from 1.1 to 2.4. It is read
+    for the data of sysex events, which no function of the API returns.
+    """
+
+    _fields_ = [
+        ("next", CFS.c_void_p),
+        ("paramptr", CFS.c_void_p),  # sysex data, without 0xF0 and 0xF7
+        ("dtime", CFS.c_uint),
+        ("param1", CFS.c_uint),  # control number, sysex length
+        ("param2", CFS.c_uint),  # control value
+        ("type", CFS.c_ubyte),
+        ("channel", CFS.c_ubyte),
+    ]
+
+
+# [fast call path] for the playback handler of MidiPlayer
+_fast_midi_event_set_value = _fastprototype(
+    CFS.c_int, "fluid_midi_event_set_value", CFS.c_void_p, CFS.c_int
+)
+
+#: int: type of control change events
+MIDI_CONTROL_CHANGE = 0xB0
+#: int: type of sysex events
+MIDI_SYSEX = 0xF0
+
+
+def _is_reset_sysex(data: bytes) -> bool:
+    """GM/GM2 System On, GS Reset or XG System On.
+
+    FluidSynth resets all the channels of the synthesizer on these messages.
+
+    :param bytes data: sysex data, without 0xF0 and 0xF7
+    :return: True if data is one of them
+    """
+    if len(data) >= 4 and data[0] == 0x7E and data[2] == 0x09:
+        return data[3] in (0x01, 0x03)  # GM, GM2 System On
+    if len(data) >= 7 and data[0] == 0x41 and data[2:4] == b"\x42\x12":
+        return data[4:7] == b"\x40\x00\x7f"  # GS Reset
+    if len(data) >= 6 and data[0] == 0x43 and data[1] & 0xF0 == 0x10:
+        return data[2:6] == b"\x4c\x00\x00\x7e"  # XG System On
+    return False
+
+
 # MIDI sequencer
 # [user defined data type]
 
@@ -552,6 +639,25 @@ fluid_event_note = _prototype(
     (CFS.c_uint, 1, "duration"),
 )
 
+# [fast call path] for Sequencer.notes_at, positional arguments only
+_fast_event_note = _fastprototype(
+    None,
+    "fluid_event_note",
+    CFS.c_void_p,
+    CFS.c_int,
+    CFS.c_short,
+    CFS.c_short,
+    CFS.c_uint,
+)
+_fast_sequencer_send_at = _fastprototype(
+    CFS.c_int,
+    "fluid_sequencer_send_at",
+    CFS.c_void_p,
+    CFS.c_void_p,
+    CFS.c_uint,
+    CFS.c_int,
+)
+
 fluid_event_timer = _prototype(
     None, "fluid_event_timer", (CFS.c_void_p, 1, "evt"), (CFS.c_void_p, 1, "data")
 )
@@ -936,7 +1042,74 @@ fluid_synth_system_reset = _prototype(
 )
 fluid_synth_system_reset.errcheck = _errcheck
 
+# [fast call path] for Synthesizer, positional arguments only
+_fast_synth_noteon = _fastprototype(
+    CFS.c_int, "fluid_synth_noteon", CFS.c_void_p, CFS.c_int, CFS.c_int, CFS.c_int
+)
+_fast_synth_noteoff = _fastprototype(
+    CFS.c_int, "fluid_synth_noteoff", CFS.c_void_p, CFS.c_int, CFS.c_int
+)
+_fast_synth_cc = _fastprototype(
+    CFS.c_int, "fluid_synth_cc", CFS.c_void_p, CFS.c_int, CFS.c_int, CFS.c_int
+)
+_fast_synth_pitch_bend = _fastprototype(
+    CFS.c_int, "fluid_synth_pitch_bend", CFS.c_void_p, CFS.c_int, CFS.c_int
+)
+_fast_synth_program_select = _fastprototype(
+    CFS.c_int,
+    "fluid_synth_program_select",
+    CFS.c_void_p,
+    CFS.c_int,
+    CFS.c_int,
+    CFS.c_int,
+    CFS.c_int,
+)
+
 # Synthesizer - MIDI Channel Setup
+# [ENUM]
+
+
+class CHANNEL_TYPE(IntEnum):
+    MELODIC = 0
+    DRUM = auto()
+
+
+# [API prototype]
+fluid_synth_set_channel_type = _prototype(
+    CFS.c_int,
+    "fluid_synth_set_channel_type",
+    (CFS.c_void_p, 1, "synth"),
+    (CFS.c_int, 1, "chan"),
+    (CFS.c_int, 1, "type"),
+)
+fluid_synth_set_channel_type.errcheck = _errcheck
+
+fluid_synth_program_change = _prototype(
+    CFS.c_int,
+    "fluid_synth_program_change",
+    (CFS.c_void_p, 1, "synth"),
+    (CFS.c_int, 1, "chan"),
+    (CFS.c_int, 1, "program"),
+)
+fluid_synth_program_change.errcheck = _errcheck
+
+fluid_synth_bank_select = _prototype(
+    CFS.c_int,
+    "fluid_synth_bank_select",
+    (CFS.c_void_p, 1, "synth"),
+    (CFS.c_int, 1, "chan"),
+    (CFS.c_int, 1, "bank"),
+)
+fluid_synth_bank_select.errcheck = _errcheck
+
+fluid_synth_unset_program = _prototype(
+    CFS.c_int,
+    "fluid_synth_unset_program",
+    (CFS.c_void_p, 1, "synth"),
+    (CFS.c_int, 1, "chan"),
+)
+fluid_synth_unset_program.errcheck = _errcheck
+
 # Synthesizer - MIDI Tuning
 
 # Synthesizer - SoundFont managiment
@@ -995,21 +1168,70 @@ fluid_synth_set_gain = _prototype(
     None, "fluid_synth_set_gain", (CFS.c_void_p, 1, "synth"), (CFS.c_float, 1, "gain")
 )
 
+fluid_synth_get_polyphony = _prototype(
+    CFS.c_int, "fluid_synth_get_polyphony", (CFS.c_void_p, 1, "synth")
+)
+fluid_synth_get_polyphony.errcheck = _errcheck
+
+fluid_synth_set_polyphony = _prototype(
+    CFS.c_int,
+    "fluid_synth_set_polyphony",
+    (CFS.c_void_p, 1, "synth"),
+    (CFS.c_int, 1, "polyphony"),
+)
+fluid_synth_set_polyphony.errcheck = _errcheck
+
 # Synthesizer - Voice Control
 
 # [typing alias]
 PRESET = dict[str, Union[int, str, None]]
 
+#: int: MIDI channels of a partition of a shared synthesizer
+PARTITION_CHANNELS = 16
+
 
 class Synthesizer:
     """SoundFont synthesizer.
 
     :param dict kwargs: kwargs = {
             'settings':'config/settings.json',
-            'soundfont':['sf2/FluidR3_GM.sf2', 'sf2/SGM-V2.01.sf2']}
+            'overrides':{'synth.polyphony': 64, 'synth.cpu-cores': 1},
+            'soundfont':['sf2/FluidR3_GM.sf2', 'sf2/SGM-V2.01.sf2'],
+            'engine': engine(),
+            'partition': 1}
+
+        'overrides' are applied after 'settings', before the synthesizer is created.
+
+        With 'engine', the synthesizer, soundfonts and audio driver of that
+        Synthesizer are shared instead of made, 'settings', 'overrides' and
+        'soundfont' are ignored. Channels 0-15 of the methods are then the
+        channels of 'partition', e.g. 16-31 for partition 1, so each user of
+        the engine has its own 16 channels, see "synth.midi-channels". The
+        gain is then the gain of the partition, see :attr:`gain`.
     """
 
+    #: WeakValueDictionary: partitions of the engine, {first channel: Synthesizer}
+    _partitions: Any = None
+
     def __init__(self, **kwargs: dict[str, Any]) -> None:
+        # engine shared, None if the synthesizer is owned
+        self._engine: Any = kwargs.get("engine")
+        # first channel of the partition
+        self._offset: int = int(kwargs.get("partition", 0)) * PARTITION_CHANNELS
+        if self._engine is not None:
+            self._settings: int = self._engine._settings
+            self._synth: int = self._engine._synth
+            self._synth_handle: CFS.c_void_p = self._engine._synth_handle
+            self._soundfonts: dict[str, int] = self._engine._soundfonts
+            self._gain: float = self._engine.gain
+            # expression of each channel, sent scaled by _ratio, see gain
+            self._expressions: list = [127] * PARTITION_CHANNELS
+            self._ratio: float = 1.0
+            if self._engine._partitions is None:
+                self._engine._partitions = WeakValueDictionary()
+            self._engine._partitions[self._offset] = self
+            self._engine._level_partitions()
+            return
         try:
             for i in range(FLUID_LOG_LEVEL.LAST_LOG_LEVEL):
                 fluid_set_log_function(level=i, fun=_log_func, data=None)
@@ -1017,10 +1239,14 @@ class Synthesizer:
             self._settings: int = int(new_fluid_settings())
             if "settings" in kwargs:
                 self._customaize_settings(json_filename=str(kwargs["settings"]))
+            if "overrides" in kwargs:
+                self._override_settings(overrides=dict(kwargs["overrides"]))
 
             self._synth: int = int(
                 new_fluid_synth(settings=CFS.c_void_p(self._settings))
             )
+            # made once for the fast call path
+            self._synth_handle: CFS.c_void_p = CFS.c_void_p(self._synth)
 
             self._soundfonts: dict[str, int] = dict()  # filename, sfont id
             if "soundfont" in kwargs:
@@ -1066,6 +1292,12 @@ class Synthesizer:
             )
 
     def __del__(self) -> None:
+        if self._engine is not None:
+            self._all_sounds_off()  # the engine lives on
+            if self._engine._partitions.get(self._offset) is self:
+                del self._engine._partitions[self._offset]
+                self._engine._level_partitions()
+            return
         if type(self) == Synthesizer:
             self._delete_auido_driver()
         delete_fluid_synth(synth=CFS.c_void_p(self._synth))
@@ -1107,7 +1339,30 @@ class Synthesizer:
                     str=str(dicts["value"]).encode(),
                 )
 
+    def _override_settings(self, overrides: dict) -> None:
+        for name, value in overrides.items():
+            if isinstance(value, float):
+                fluid_settings_setnum(
+                    settings=CFS.c_void_p(self._settings),
+                    name=str(name).encode(),
+                    value=CFS.c_double(value),
+                )
+            elif isinstance(value, int):
+                fluid_settings_setint(
+                    settings=CFS.c_void_p(self._settings),
+                    name=str(name).encode(),
+                    val=CFS.c_int(value),
+                )
+            elif isinstance(value, str):
+                fluid_settings_setstr(
+                    settings=CFS.c_void_p(self._settings),
+                    name=str(name).encode(),
+                    str=value.encode(),
+                )
+
     def _assign_audio_driver(self) -> int:
+        if self._engine is not None:
+            return int(getattr(self._engine, "_audio_driver", 0))  # not deleted here
         self._audio_driver = int(
             new_fluid_audio_driver(
                 settings=CFS.c_void_p(self._settings), synth=CFS.c_void_p(self._synth)
@@ -1142,28 +1397,164 @@ class Synthesizer:
         )
 
     def _all_notes_off(self, chan: int = -1) -> int:
-        return fluid_synth_all_notes_off(
-            synth=CFS.c_void_p(self._synth), chan=CFS.c_int(chan)
-        )
+        for c in self._channels(chan):
+            fluid_synth_all_notes_off(
+                synth=CFS.c_void_p(self._synth), chan=CFS.c_int(c)
+            )
+        return FLUID_OK
 
     def _all_sounds_off(self, chan: int = -1) -> int:
-        return fluid_synth_all_sounds_off(
-            synth=CFS.c_void_p(self._synth), chan=CFS.c_int(chan)
+        for c in self._channels(chan):
+            fluid_synth_all_sounds_off(
+                synth=CFS.c_void_p(self._synth), chan=CFS.c_int(c)
+            )
+        return FLUID_OK
+
+    def _channels(self, chan: int) -> list[int]:
+        """Synthesizer channels of a channel, -1 for all.
+
+        :param int chan: channel of the partition, -1 for all
+        :return: channels, [-1] for all channels of an owned synthesizer
+        """
+        if chan >= 0:
+            return [chan + self._offset]
+        if self._engine is None and not self._offset:
+            return [-1]
+        return list(range(self._offset, self._offset + PARTITION_CHANNELS))
+
+    def drum_channel(self, chan: int) -> int:
+        """Make a channel a drum channel, playing the standard drum kit.
+
+        Needed for the drum channel 9 of a partition other than 0.
+
+        :param int chan: channel
+        :return: FLUID_OK
+        """
+        fluid_synth_set_channel_type(
+            synth=CFS.c_void_p(self._synth),
+            chan=CFS.c_int(chan + self._offset),
+            type=CFS.c_int(CHANNEL_TYPE.DRUM),
         )
+        return fluid_synth_program_change(
+            synth=CFS.c_void_p(self._synth),
+            chan=CFS.c_int(chan + self._offset),
+            program=CFS.c_int(0),
+        )
+
+    def preload(self, presets: list) -> int:
+        """Keep the samples of presets loaded, one preset per channel.
+
+        With "synth.dynamic-sample-loading" the samples of a preset are loaded
+        when it is selected on a channel, and unloaded when no channel selects
+        it. Selecting the presets of a song ahead loads their samples before
+        playback, and the presets selected before are released.
+
+        :param list presets: (bank, program) of each preset, the first 16 are held
+        :return: number of presets held
+        """
+        synth = CFS.c_void_p(self._synth)
+        count = 0
+        for chan in range(PARTITION_CHANNELS):
+            c = CFS.c_int(chan + self._offset)
+            if chan < len(presets):
+                bank, program = presets[chan]
+                try:
+                    fluid_synth_bank_select(synth=synth, chan=c, bank=CFS.c_int(bank))
+                    fluid_synth_program_change(
+                        synth=synth, chan=c, program=CFS.c_int(program)
+                    )
+                    count += 1
+                    continue
+                except FSError as msg:
+                    self._log(level=FLUID_LOG_LEVEL.WARN, message=f"preload {str(msg)}")
+            fluid_synth_unset_program(synth=synth, chan=c)
+        return count
+
+    def reset(self) -> int:
+        """Reset the channels of the partition, the other partitions go on.
+
+        The same as the system reset of FluidSynth for these channels: sounds
+        off, controllers reset, bank 0 program 0, and the standard drum kit on
+        the drum channel 9.
+
+        :return: FLUID_OK
+        """
+        synth = CFS.c_void_p(self._synth)
+        for chan in range(PARTITION_CHANNELS):
+            c = CFS.c_int(chan + self._offset)
+            drum = chan == 9
+            fluid_synth_all_sounds_off(synth=synth, chan=c)
+            _fast_synth_cc(self._synth_handle, chan + self._offset, 0x79, 0)
+            fluid_synth_set_channel_type(
+                synth=synth,
+                chan=c,
+                type=CFS.c_int(CHANNEL_TYPE.DRUM if drum else CHANNEL_TYPE.MELODIC),
+            )
+            fluid_synth_bank_select(synth=synth, chan=c, bank=CFS.c_int(128 * drum))
+            fluid_synth_program_change(synth=synth, chan=c, program=CFS.c_int(0))
+        if self._engine is not None:
+            # "Reset All Controllers" resets the expression
+            self._expressions = [127] * PARTITION_CHANNELS
+            self._send_expressions()
+        return FLUID_OK
 
     def _panic(self) -> int:
         return fluid_synth_system_reset(synth=CFS.c_void_p(self._synth))
 
     @property
     def gain(self) -> float:
-        """float: gain - defalt 0.2, Min 0.0, Max 10.0"""
+        """float: gain - defalt 0.2, Min 0.0, Max 10.0
+
+        With 'engine', the gain of the partition. The gain of the engine follows
+        the loudest partition, the others are scaled down by "Expression"
+        (CC 11) on their channels, see :meth:`expression`.
+        """
+        if self._engine is not None:
+            return self._gain
         return float(fluid_synth_get_gain(synth=CFS.c_void_p(self._synth)))
 
     @gain.setter
     def gain(self, value: float) -> float:
+        if self._engine is not None:
+            self._gain = value
+            self._engine._level_partitions()
+            return self._gain
         fluid_synth_set_gain(synth=CFS.c_void_p(self._synth), gain=CFS.c_float(value))
         return float(fluid_synth_get_gain(synth=CFS.c_void_p(self._synth)))
 
+    def _level_partitions(self) -> None:
+        """Set the gain of the engine to the loudest partition, scale the others."""
+        partitions = list((self._partitions or {}).values())
+        if not partitions:
+            return
+        top = max(partition._gain for partition in partitions)
+        fluid_synth_set_gain(synth=CFS.c_void_p(self._synth), gain=CFS.c_float(top))
+        for partition in partitions:
+            # expression attenuates by 40log10(127/CC 11) dB, squared in amplitude
+            partition._ratio = sqrt(partition._gain / top) if top > 0 else 0.0
+            partition._send_expressions()
+
+    def _send_expressions(self) -> None:
+        """Send the expression of each channel of the partition, scaled."""
+        for chan, val in enumerate(self._expressions):
+            _fast_synth_cc(
+                self._synth_handle,
+                chan + self._offset,
+                0x0B,
+                int(round(val * self._ratio)),
+            )
+
+    @property
+    def polyphony(self) -> int:
+        """int: maximum number of voices, "synth.polyphony" changed on the fly"""
+        return int(fluid_synth_get_polyphony(synth=CFS.c_void_p(self._synth)))
+
+    @polyphony.setter
+    def polyphony(self, value: int) -> None:
+        fluid_synth_set_polyphony(
+            synth=CFS.c_void_p(self._synth), polyphony=CFS.c_int(value)
+        )
+
     @property
     def soundfonts(self) -> list:
         """list(str): sonundfont file names"""
@@ -1245,7 +1636,7 @@ class Synthesizer:
         """
         result: list[PRESET] = list()
         for chan in range(15):
-            result += [self._channel_preset(chan)]
+            result += [self._channel_preset(chan + self._offset)]
         return result
 
     def _channel_preset(self, chan: int) -> PRESET:
@@ -1303,9 +1694,7 @@ class Synthesizer:
         :param int val: _description_
         :return: _description_
         """
-        return fluid_synth_pitch_bend(
-            synth=CFS.c_void_p(self._synth), chan=CFS.c_int(chan), val=CFS.c_int(val)
-        )
+        return _fast_synth_pitch_bend(self._synth_handle, chan + self._offset, val)
 
     def pitch_wheel_sens(self, chan: int, val: int) -> int:
         """pitch_wheel_sens _summary_
@@ -1315,7 +1704,9 @@ class Synthesizer:
         :return: _description_
         """
         return fluid_synth_pitch_wheel_sens(
-            synth=CFS.c_void_p(self._synth), chan=CFS.c_int(chan), val=CFS.c_int(val)
+            synth=CFS.c_void_p(self._synth),
+            chan=CFS.c_int(chan + self._offset),
+            val=CFS.c_int(val),
         )
 
     def program_select(self, chan: int, sfont_id: int, bank: int, preset: int) -> int:
@@ -1327,12 +1718,8 @@ class Synthesizer:
         :param int preset: _description_
         :return: _description_
         """
-        return fluid_synth_program_select(
-            synth=CFS.c_void_p(self._synth),
-            chan=CFS.c_int(chan),
-            sfont_id=CFS.c_int(sfont_id),
-            bank_num=CFS.c_int(bank),
-            preset_num=CFS.c_int(preset),
+        return _fast_synth_program_select(
+            self._synth_handle, chan + self._offset, sfont_id, bank, preset
         )
 
     def note_on(self, channel: int, keyNumber: int, velocity: int) -> int:
@@ -1343,11 +1730,8 @@ class Synthesizer:
         :param int velocity: _description_
         :return: _description_
         """
-        return fluid_synth_noteon(
-            synth=CFS.c_void_p(self._synth),
-            chan=CFS.c_int(channel),
-            key=CFS.c_int(keyNumber),
-            vel=CFS.c_int(velocity),
+        return _fast_synth_noteon(
+            self._synth_handle, channel + self._offset, keyNumber, velocity
         )
 
     def note_off(self, channel: int, keyNumber: int) -> int:
@@ -1358,11 +1742,7 @@ class Synthesizer:
         :return: _description_
         """
         try:
-            fluid_synth_noteoff(
-                synth=CFS.c_void_p(self._synth),
-                chan=CFS.c_int(channel),
-                key=CFS.c_int(keyNumber),
-            )
+            _fast_synth_noteoff(self._synth_handle, channel + self._offset, keyNumber)
             return FLUID_OK
         except FSError as msg:
             self._log(level=FLUID_LOG_LEVEL.ERR, message=f"synth noteoff. {str(msg)}")
@@ -1375,12 +1755,7 @@ class Synthesizer:
         :param int val: _description_
         :return: _description_
         """
-        return fluid_synth_cc(
-            synth=CFS.c_void_p(self._synth),
-            chan=CFS.c_int(chan),
-            num=CFS.c_int(0x01),
-            val=CFS.c_int(val),
-        )
+        return _fast_synth_cc(self._synth_handle, chan + self._offset, 0x01, val)
 
     def volume(self, chan: int, val: int) -> int:
         """Set the maximum allowable value of velocity.
@@ -1389,12 +1764,7 @@ class Synthesizer:
         :param int val: _description_
         :return: _description_
         """
-        return fluid_synth_cc(
-            synth=CFS.c_void_p(self._synth),
-            chan=CFS.c_int(chan),
-            num=CFS.c_int(0x07),
-            val=CFS.c_int(val),
-        )
+        return _fast_synth_cc(self._synth_handle, chan + self._offset, 0x07, val)
 
     def sustain_on(self, chan: int) -> int:
         """The sound echoes for a long time.
@@ -1402,12 +1772,7 @@ class Synthesizer:
         :param int chan: _description_
         :return: _description_
         """
-        return fluid_synth_cc(
-            synth=CFS.c_void_p(self._synth),
-            chan=CFS.c_int(chan),
-            num=CFS.c_int(0x40),
-            val=CFS.c_int(0b00100000),
-        )
+        return _fast_synth_cc(self._synth_handle, chan + self._offset, 0x40, 0b00100000)
 
     def sustain_off(self, chan: int) -> int:
         """sustain_off _summary_
@@ -1415,12 +1780,7 @@ class Synthesizer:
         :param int chan: _description_
         :return: _description_
         """
-        return fluid_synth_cc(
-            synth=CFS.c_void_p(self._synth),
-            chan=CFS.c_int(chan),
-            num=CFS.c_int(0x40),
-            val=CFS.c_int(0b00000000),
-        )
+        return _fast_synth_cc(self._synth_handle, chan + self._offset, 0x40, 0b00000000)
 
     def pan(self, chan: int, val: int) -> int:
         """pan _summary_
@@ -1429,26 +1789,21 @@ class Synthesizer:
         :param int val: _description_
         :return: _description_
         """
-        return fluid_synth_cc(
-            synth=CFS.c_void_p(self._synth),
-            chan=CFS.c_int(chan),
-            num=CFS.c_int(0x0A),
-            val=CFS.c_int(val),
-        )
+        return _fast_synth_cc(self._synth_handle, chan + self._offset, 0x0A, val)
 
     def expression(self, chan: int, val: int) -> int:
         """Temporary velocity can be set above volume.
 
+        With 'engine', the expression is scaled by the gain of the partition.
+
         :param int chan: _description_
         :param int val: _description_
         :return: _description_
         """
-        return fluid_synth_cc(
-            synth=CFS.c_void_p(self._synth),
-            chan=CFS.c_int(chan),
-            num=CFS.c_int(0x0B),
-            val=CFS.c_int(val),
-        )
+        if self._engine is not None:
+            self._expressions[chan] = val
+            val = int(round(val * self._ratio))
+        return _fast_synth_cc(self._synth_handle, chan + self._offset, 0x0B, val)
 
 
 class Sequencer(Synthesizer):
@@ -1590,13 +1945,47 @@ class Sequencer(Synthesizer):
         event = self._assign_event(source=source, destination=destination)
         fluid_event_note(
             evt=CFS.c_void_p(event),
-            channel=CFS.c_int(channel),
+            channel=CFS.c_int(channel + self._offset),
             key=CFS.c_short(key_number),
             vel=CFS.c_short(velocity),
             duration=CFS.c_uint(duration),
         )
         self._send_event_at(event=event, ticks=ticks, absolute=absolute)
 
+    def notes_at(
+        self,
+        notes: Any,
+        source: int = -1,
+        destination: int = -1,
+        absolute: bool = True,
+    ) -> int:
+        """Schedule many notes through one sequencer event.
+
+        The event is made once and only its note is changed between sends,
+        the sequencer keeps a copy of each event sent. Arguments are passed
+        positionally as plain int, without a ctypes object per argument.
+
+        :param Any notes: (ticks, channel, key number, velocity, duration) of each
+            note, an iterable of tuples or a numpy array of shape (n, 5)
+        :param int source: source client, defaults to -1
+        :param int destination: destination client, defaults to -1
+        :param bool absolute: ticks are absolute, defaults to True
+        :return: number of notes scheduled
+        """
+        if hasattr(notes, "tolist"):
+            notes = notes.tolist()  # numpy integers are not accepted by ctypes
+        seq, evt = self._sequencer, self._assign_event(source, destination)
+        note, send_at, offset = _fast_event_note, _fast_sequencer_send_at, self._offset
+        count = 0
+        try:
+            for ticks, channel, key_number, velocity, duration in notes:
+                note(evt, channel + offset, key_number, velocity, duration)
+                send_at(seq, evt, ticks, absolute)
+                count += 1
+        finally:
+            delete_fluid_event(evt=CFS.c_void_p(evt))
+        return count
+
     def timer_at(
         self,
         ticks: int,
@@ -1663,6 +2052,8 @@ class MidiRouter(Synthesizer):
                     router=CFS.c_void_p(self._midi_router),
                 )
             )
+            if self._offset:
+                self.apply_rules()  # the default rules do not move channels
         except FSError as msg:
             self._log(level=FLUID_LOG_LEVEL.ERR, message=f"Midi Router.  {str(msg)}")
             self.__del__()
@@ -1672,40 +2063,69 @@ class MidiRouter(Synthesizer):
         delete_fluid_midi_router(router=CFS.c_void_p(self._midi_router))
         super().__del__()
 
-    def apply_rules(self, rule_file: Union[str, None] = None) -> bool:
+    def apply_rules(self, rule_file: Union[str, dict, None] = None) -> bool:
         """Apply rules for MIDI events.
 
         :param str rule_file: Rule file to be applied  in json file,
-            or default rules if none
+            the rules themselves as a dict, or default rules if none
+
+            Channels are moved to the partition, see :class:`Synthesizer`.
 
         :return: True, or False
         """
         try:
             fluid_midi_router_clear_rules(router=CFS.c_void_p(self._midi_router))
 
-            if rule_file is None:
+            if rule_file is None and self._offset:
+                self._add_rules(
+                    {
+                        rule_type.name: {
+                            "type": rule_type,
+                            "chan": None,
+                            "param1": None,
+                            "param2": None,
+                        }
+                        for rule_type in FLUID_MIDI_ROUTER_RULE_TYPE
+                        if rule_type != FLUID_MIDI_ROUTER_RULE_TYPE.COUNT
+                    }
+                )
+            elif rule_file is None:
                 fluid_midi_router_set_default_rules(
                     router=CFS.c_void_p(self._midi_router)
                 )
             else:
-                with open(rule_file, "r") as fp:
-                    rules_json = load(fp)
-
-                for rd in rules_json.values():
-                    rule = new_fluid_midi_router_rule()
-                    if rd["chan"] is not None:
-                        fluid_midi_router_rule_set_chan(rule, *rd["chan"].values())
-                    if rd["param1"] is not None:
-                        fluid_midi_router_rule_set_param1(rule, *rd["param1"].values())
-                    if rd["param2"] is not None:
-                        fluid_midi_router_rule_set_param2(rule, *rd["param2"].values())
-                    fluid_midi_router_add_rule(self._midi_router, rule, rd["type"])
+                if isinstance(rule_file, dict):
+                    rules_json = rule_file
+                else:
+                    with open(rule_file, "r") as fp:
+                        rules_json = load(fp)
+                self._add_rules(rules_json)
         except FSError as msg:
             self._log(level=FLUID_LOG_LEVEL.ERR, message=f"Midi Router Rule {str(msg)}")
             return False
         else:
             return True
 
+    def _add_rules(self, rules_json: dict) -> None:
+        """Add rules, moving channels to the partition.
+
+        :param dict rules_json: rules, see "config/rule.mute_chan.json"
+        """
+        for rd in rules_json.values():
+            chan = rd["chan"]
+            if self._offset:
+                if chan is None:
+                    chan = {"min": 0, "max": PARTITION_CHANNELS - 1, "mul": 1.0}
+                chan = dict(chan, add=chan.get("add", 0) + self._offset)
+            rule = new_fluid_midi_router_rule()
+            if chan is not None:
+                fluid_midi_router_rule_set_chan(rule, *chan.values())
+            if rd["param1"] is not None:
+                fluid_midi_router_rule_set_param1(rule, *rd["param1"].values())
+            if rd["param2"] is not None:
+                fluid_midi_router_rule_set_param2(rule, *rd["param2"].values())
+            fluid_midi_router_add_rule(self._midi_router, rule, rd["type"])
+
 
 class MidiDriver(MidiRouter):
     """Sends MIDI events received at the MIDI input to the synthesizer.
@@ -1742,6 +2162,23 @@ class MidiDriver(MidiRouter):
         super().__del__()
 
 
+#: WeakValueDictionary: players on the engine, {MIDI router: MidiPlayer}
+_engine_players: Any = WeakValueDictionary()
+
+
+@HANDLE_MIDI_EVENT_FUNC_T
+def _engine_playback(data: int, event: int) -> int:
+    """Playback handler of the players on the engine, see :meth:`MidiPlayer.load`.
+
+    :param int data: MIDI router of the player
+    :param int event: MIDI event
+    """
+    player = _engine_players.get(data)
+    if player is None:
+        return FLUID_OK
+    return player._playback(data, event)
+
+
 class MidiPlayer(MidiRouter):
     """Parse standard MIDI files and emit MIDI events.
 
@@ -1749,36 +2186,31 @@ class MidiPlayer(MidiRouter):
             "settings":"config/settings.json",
             "soundfont":["sf2/FluidR3_GM.sf2", "sf2/SGM-V2.01.sf2"],
             "handler": fluid_midi_dump_prerouter,
-            "standardmidifile": ["mid/SenBonZakura.mid", "mid/111867.MID"]}
+            "standardmidifile": ["mid/SenBonZakura.mid", "mid/111867.MID"],
+            "standardmidibuffer": [smf_bytes]}
+
+        "standardmidibuffer" are SMF data in memory, queued after the files.
+        Other files are played by the same object after :meth:`load`.
+
+        With 'engine', a reset of the synthesizer sent by the song, i.e. GM,
+        GS or XG System On, resets only the partition, and the expression of
+        the song is scaled by the gain of the partition, see :attr:`gain`.
     """
 
     def __init__(self, **kwargs: dict[str, Any]) -> None:
         super().__init__(**kwargs)
         try:
-            self._player: int = int(new_fluid_player(synth=CFS.c_void_p(self._synth)))
-
             if "handler" in kwargs:
-                callback = kwargs["handler"]
+                self._handler: Any = kwargs["handler"]
             else:
-                callback = fluid_midi_router_handle_midi_event
-
-            fluid_player_set_playback_callback(
-                player=CFS.c_void_p(self._player),
-                handler=callback,
-                handler_data=CFS.c_void_p(self._midi_router),
-            )
+                self._handler = fluid_midi_router_handle_midi_event
+            if self._engine is not None:
+                _engine_players[self._midi_router] = self
 
-            for filename in kwargs["standardmidifile"]:
-                if fluid_is_midifile(filename.encode()):
-                    print(filename)
-                    ptr: bytes = Path(filename).read_bytes()
-                    fluid_player_add_mem(
-                        player=CFS.c_void_p(self._player),
-                        buffer=ptr,
-                        len=CFS.c_size_t(len(ptr)),
-                    )
+            self.load(kwargs.get("standardmidifile"), kwargs.get("standardmidibuffer"))
 
-            self._assign_audio_driver()
+            if type(self) == MidiPlayer:
+                self._assign_audio_driver()
         except FSError as msg:
             self._log(level=FLUID_LOG_LEVEL.ERR, message=f"Midi Player. {str(msg)}")
             self.__del__()
@@ -1788,17 +2220,94 @@ class MidiPlayer(MidiRouter):
         delete_fluid_player(player=CFS.c_void_p(self._player))
         super().__del__()
 
+    def load(
+        self,
+        standardmidifile: Union[list, None] = None,
+        standardmidibuffer: Union[list, None] = None,
+    ) -> None:
+        """Replace the queued files, stopping playback.
+
+        Only the player is made again, the synthesizer, the MIDI router and the
+        audio driver are kept. With 'engine', only the partition is reset, see
+        :meth:`Synthesizer.reset`, "player.reset-synth" of the engine is 0.
+
+        :param list standardmidifile: SMF files, defaults to None
+        :param list standardmidibuffer: SMF data in memory, queued after the files,
+            defaults to None
+        """
+        if hasattr(self, "_player"):
+            self.stop()
+            delete_fluid_player(player=CFS.c_void_p(self._player))
+
+        self._player: int = int(new_fluid_player(synth=CFS.c_void_p(self._synth)))
+        fluid_player_set_playback_callback(
+            player=CFS.c_void_p(self._player),
+            handler=_engine_playback if self._engine is not None else self._handler,
+            handler_data=CFS.c_void_p(self._midi_router),
+        )
+
+        for filename in standardmidifile or []:
+            if fluid_is_midifile(filename.encode()):
+                logger.debug(filename)
+                ptr: bytes = Path(filename).read_bytes()
+                fluid_player_add_mem(
+                    player=CFS.c_void_p(self._player),
+                    buffer=ptr,
+                    len=CFS.c_size_t(len(ptr)),
+                )
+
+        for ptr in standardmidibuffer or []:
+            # fluidsynth copies the buffer
+            fluid_player_add_mem(
+                player=CFS.c_void_p(self._player),
+                buffer=bytes(ptr),
+                len=CFS.c_size_t(len(ptr)),
+            )
+
+        if self._engine is not None:
+            self.reset()  # "player.reset-synth" of the engine would reset all
+
+    def _playback(self, data: int, event: int) -> int:
+        """Pass an event of the song to the handler, keeping it in the partition.
+
+        :param int data: MIDI router
+        :param int event: MIDI event
+        :return: FLUID_OK, or FLUID_FAILED
+        """
+        evt = MidiEventData.from_address(event)
+        chan = evt.channel % PARTITION_CHANNELS
+        if evt.type == MIDI_SYSEX:
+            if _is_reset_sysex(CFS.string_at(evt.paramptr, evt.param1)):
+                self.reset()  # not the other partitions
+                return FLUID_OK
+        elif evt.type == MIDI_CONTROL_CHANGE and evt.param1 == 0x0B:
+            self._expressions[chan] = evt.param2
+            _fast_midi_event_set_value(event, int(round(evt.param2 * self._ratio)))
+        try:
+            result = int(self._handler(data, event))
+        except FSError:
+            return FLUID_FAILED
+        if evt.type == MIDI_CONTROL_CHANGE and evt.param1 == 0x79:
+            self.expression(chan, 127)  # "Reset All Controllers" of the song
+        return result
+
     def playback(self, start_tick: int = 0) -> None:
         """Start playback.
 
         :param start_tick: tick at the position where you want to start
         """
 
-        fluid_player_play(player=CFS.c_void_p(self._player))
-        sleep(0.1)  # Wait for seekable
-        fluid_player_seek(
-            player=CFS.c_void_p(self._player), ticks=CFS.c_int(start_tick)
-        )
+        if self.total_ticks:  # resumed, the file is loaded and seekable
+            fluid_player_seek(
+                player=CFS.c_void_p(self._player), ticks=CFS.c_int(start_tick)
+            )
+            fluid_player_play(player=CFS.c_void_p(self._player))
+        else:
+            fluid_player_play(player=CFS.c_void_p(self._player))
+            sleep(0.1)  # Wait for seekable
+            fluid_player_seek(
+                player=CFS.c_void_p(self._player), ticks=CFS.c_int(start_tick)
+            )
         fluid_player_join(player=CFS.c_void_p(self._player))
 
     def stop(self) -> int:
@@ -1822,5 +2331,109 @@ class MidiPlayer(MidiRouter):
         return int(fluid_player_get_total_ticks(player=CFS.c_void_p(self._player)))
 
 
+class FileRenderer(MidiPlayer):
+    """Render standard MIDI files to an audio file, faster than real time.
+
+    No audio driver is made, blocks of "audio.period-size" frames are rendered
+    in a loop and the player is timed by the rendered samples.
+
+    :param dict kwargs: kwargs = {
+            "settings":"config/settings.json",
+            "soundfont":["sf2/FluidR3_GM.sf2"],
+            "standardmidifile": ["mid/example.mid"],
+            "standardmidibuffer": [smf_bytes],
+            "filename": "wav/example.wav",
+            "filetype": "wav",
+            "fileformat": "float"}
+
+        "filetype" is "wav" or "raw", "fileformat" is "float" or "s16",
+        defaults to "wav" and "float". They are applied as 'overrides'.
+
+    :raises ValueError: "engine" is given, a renderer makes its own synthesizer
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        if kwargs.get("engine") is not None:
+            raise ValueError("FileRenderer makes its own synthesizer, not an engine")
+        overrides = dict(kwargs.get("overrides", {}))
+        overrides["player.timing-source"] = "sample"
+        overrides["audio.file.name"] = str(kwargs.get("filename", "fluidsynth.wav"))
+        overrides["audio.file.type"] = str(kwargs.get("filetype", "wav"))
+        overrides["audio.file.format"] = str(kwargs.get("fileformat", "float"))
+        super().__init__(**dict(kwargs, overrides=overrides))
+        try:
+            self._renderer: int = int(
+                new_fluid_file_renderer(synth=CFS.c_void_p(self._synth))
+            )
+        except (FSError, TypeError) as msg:  # TypeError, NULL is returned
+            self._log(level=FLUID_LOG_LEVEL.ERR, message=f"File Renderer. {str(msg)}")
+            self.__del__()
+
+    def __del__(self) -> None:
+        if getattr(self, "_renderer", None):
+            delete_fluid_file_renderer(dev=CFS.c_void_p(self._renderer))
+        super().__del__()
+
+    def render(self, tail: float = 1.0) -> dict[str, float]:
+        """Render the queued files to the end.
+
+        :param float tail: seconds rendered after the end, for release and reverb
+        :return: {"seconds": audio rendered, "elapsed": time taken,
+            "realtime_factor": seconds / elapsed}
+        """
+        period, rate = CFS.c_int(), CFS.c_double()
+        fluid_settings_getint(
+            settings=CFS.c_void_p(self._settings),
+            name=b"audio.period-size",
+            val=CFS.byref(period),
+        )
+        fluid_settings_getnum(
+            settings=CFS.c_void_p(self._settings),
+            name=b"synth.sample-rate",
+            val=CFS.byref(rate),
+        )
+        player, renderer = CFS.c_void_p(self._player), CFS.c_void_p(self._renderer)
+        process_block = fluid_file_renderer_process_block
+
+        start = perf_counter()
+        fluid_player_play(player=player)
+        blocks = 0
+        while fluid_player_get_status(player=player) == FLUID_PLAYER_STATUS.PLAYING:
+            process_block(renderer)
+            blocks += 1
+        for _ in range(int(tail * rate.value / period.value)):
+            process_block(renderer)
+            blocks += 1
+        elapsed = perf_counter() - start
+
+        seconds = blocks * period.value / rate.value
+        return {
+            "seconds": seconds,
+            "elapsed": elapsed,
+            "realtime_factor": seconds / elapsed if elapsed else float("inf"),
+        }
+
+
+_engine: Union[Synthesizer, None] = None
+
+
+def engine(**kwargs: Any) -> Synthesizer:
+    """The synthesizer shared process-wide, made by the first call.
+
+    Pass it as 'engine' to the other classes, so the soundfonts are loaded
+    and the audio driver is opened once, see :class:`Synthesizer`.
+
+    "player.reset-synth" is 0, a player resets only its partition.
+
+    :param dict kwargs: kwargs of :class:`Synthesizer`, used by the first call
+    :return: shared synthesizer, it has an audio driver
+    """
+    global _engine
+    if _engine is None:
+        overrides = dict(kwargs.get("overrides", {}), **{"player.reset-synth": 0})
+        _engine = Synthesizer(**dict(kwargs, overrides=overrides))
+    return _engine
+
+
 if __name__ == "__main__":
     print(__file__)
@@ -4,5 +4,13 @@ parts: Gain control for MIDI devices
 
 csv2mid: Generate a MID(Standard MIDI File) file from a CSV file.
 
+mid2csv: Generate a CSV file from a MID(Standard MIDI File) file.
+
 paramsmid: Parsing SMF(Standard MIDI File) files
+
+paramsf2: Presets of SoundFont files, read without a synthesizer
+
+midilibrary: Persistent index of MIDI files
+
+polyphony: Polyphony and event density of MIDI files
 """
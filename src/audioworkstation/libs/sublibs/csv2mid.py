@@ -44,17 +44,22 @@ Format of CSV file
 
 restrictions
     #. Only "GM System Level 1".
-    #. Tempo changes and odd time signatures are not supported.
+    #. "Time Signature" takes effect at tick 0 of its bar.
     #. The division is fixed at 480.
 """
 
+from bisect import bisect_right
 from dataclasses import InitVar, dataclass, field
-from typing import ClassVar
+from io import BytesIO
+from operator import attrgetter
+from typing import BinaryIO, ClassVar, Iterable
 from re import match
 import logging as LSMF
 import struct
 import csv
 
+import numpy as np
+
 
 # Logger
 logger = LSMF.getLogger(__name__)
@@ -98,6 +103,87 @@ class HeaderChunk:
         return byte_datas
 
 
+class EventRecord:
+    """EventRecord is a compact, encoded event of a track.
+
+    Fields are parsed once when the record is made, see :meth:`_SmfEvent.record`.
+    Slots keep large scores small, a dataclass cannot have slots with defaults
+    before Python 3.10.
+
+    :param int event_time: event time in ticks
+    :param int priority: order of events at the same time, smaller first
+    :param bytes data: event without delta-time
+    """
+
+    __slots__ = ("event_time", "priority", "data")
+
+    #: Callable: sort key, (event time, priority)
+    key = attrgetter("event_time", "priority")
+
+    def __init__(self, event_time: int, priority: int, data: bytes) -> None:
+        #: int: event time in ticks
+        self.event_time: int = event_time
+        #: int: order of events at the same time, smaller first
+        self.priority: int = priority
+        #: bytes: event without delta-time
+        self.data: bytes = data
+
+    def write(self, buf: bytearray) -> None:
+        """Append the event, without delta-time, to a buffer.
+
+        :param bytearray buf: buffer
+        """
+        buf += self.data
+
+
+class BarTable:
+    """BarTable is the absolute tick at the start of each bar.
+
+    Built once from all "Time Signature" of a score, so the time of each
+    event is a list lookup. Bars after the last time signature keep its
+    length.
+
+    :param Iterable signatures: (bar, nn, dd) of each "Time Signature"
+    :param int division: ticks per quarter-note
+    """
+
+    def __init__(self, signatures: Iterable = (), division: int = 480) -> None:
+        lengths: dict = {0: division * 4}  # {bar: ticks per bar}, 4/4 until changed
+        for bar, nn, dd in signatures:
+            lengths[bar] = nn * division * 4 // 2**dd
+
+        #: list: absolute tick at the start of bar 0 to the last time signature
+        self.starts: list = [0]
+        length = lengths[0]
+        for bar in range(max(lengths)):
+            length = lengths.get(bar, length)
+            self.starts.append(self.starts[-1] + length)
+        #: int: ticks per bar after the last time signature
+        self.length: int = lengths[max(lengths)]
+
+    def tick(self, bar: int) -> int:
+        """Absolute tick at the start of a bar.
+
+        :param int bar: bar number
+        :return: ticks
+        """
+        if bar < len(self.starts):
+            return self.starts[bar]
+        return self.starts[-1] + (bar + 1 - len(self.starts)) * self.length
+
+    def bar(self, tick: int) -> tuple:
+        """Bar number and tick in bar of an absolute tick.
+
+        :param int tick: absolute tick
+        :return: bar number, tick in bar
+        """
+        if tick < self.starts[-1]:
+            bar = bisect_right(self.starts, tick) - 1
+        else:
+            bar = len(self.starts) - 1 + (tick - self.starts[-1]) // self.length
+        return (bar, tick - self.tick(bar))
+
+
 @dataclass
 class _SmfEvent:
     """_SmfEvent is the base class for event."""
@@ -112,10 +198,11 @@ class _SmfEvent:
 
     #: ClassVar[int]: division, ticks per quarter-note.
     division: ClassVar[int] = 480
-    #: ClassVar[int]: beat
-    beat: ClassVar[int] = 4
-    #: ClassVar[int]: power of two, 2 represents a quarter-note, etc.
-    powers: ClassVar[int] = 2
+    #: ClassVar[BarTable]: start of each bar of the score being converted
+    bars: ClassVar[BarTable] = BarTable()
+    #: ClassVar[int]: order at the same time, meta 0, note off 1, MIDI 2,
+    #: note on 3, end of track 4
+    priority: ClassVar[int] = 2
 
     event_time: int = field(default=0, init=False)
     delta_time: int = field(default=0, init=False)
@@ -132,17 +219,31 @@ class _SmfEvent:
         cls.division = division
 
     @classmethod
-    def set_rhythm(cls, beat: int, powers: int):
-        cls.beat = beat
-        cls.powers = powers
+    def set_bars(cls, bars: BarTable):
+        cls.bars = bars
 
     def __post_init__(self, bar, tick) -> None:
-        self.event_time = int(bar) * self.beat * self.division * 4 / (2**self.powers)
-        self.event_time += int(tick)
-        self.event_time = int(self.event_time)
+        self.event_time = self.bars.tick(int(bar)) + int(tick)
+
+    def write(self, buf: bytearray) -> None:
+        """Append the event, without delta-time, to a buffer.
+
+        :param bytearray buf: buffer
+        """
+
+    def record(self) -> EventRecord:
+        """Encode the event into a compact record.
+
+        :return: record
+        """
+        buf = bytearray()
+        self.write(buf)
+        return EventRecord(self.event_time, self.priority, bytes(buf))
 
     def __bytes__(self):
-        return _convert_to_variable_length_quantity(self.delta_time)
+        buf = bytearray(_convert_to_variable_length_quantity(self.delta_time))
+        self.write(buf)
+        return bytes(buf)
 
     def __eq__(self, other) -> bool:
         """compare time: equal"""
@@ -173,8 +274,10 @@ class _SmfEvent:
 class _MetaEvnet(_SmfEvent):
     """_MetaEvent is the base class of "Meta Event"."""
 
-    def __bytes__(self):
-        return super().__bytes__() + b"\xFF"
+    priority: ClassVar[int] = 0
+
+    def write(self, buf: bytearray) -> None:
+        buf.append(0xFF)
 
     @classmethod
     def name(cls) -> list[str]:
@@ -188,11 +291,9 @@ class TextEvent(_MetaEvnet):
     #: str: text event
     text: str = ""
 
-    def __bytes__(self):
-        byte_datas = b"\x01"
-        byte_datas += int(len(self.text)).to_bytes(1, "big")
-        byte_datas += bytearray(self.text, encoding="ascii")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        _write_text(buf, 0x01, self.text)
 
     @classmethod
     def name(cls) -> list[str]:
@@ -206,11 +307,9 @@ class CopyrightNotice(_MetaEvnet):
     #: str: Copyright Notice
     text: str = ""
 
-    def __bytes__(self):
-        byte_datas = b"\x02"
-        byte_datas += int(len(self.text)).to_bytes(1, "big")
-        byte_datas += bytearray(self.text, encoding="ascii")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        _write_text(buf, 0x02, self.text)
 
     @classmethod
     def name(cls) -> list[str]:
@@ -224,11 +323,9 @@ class SequencerTrackName(_MetaEvnet):
     #: str: Sequencer / Track Name
     text: str = ""
 
-    def __bytes__(self):
-        byte_datas = b"\x03"
-        byte_datas += int(len(self.text)).to_bytes(1, "big")
-        byte_datas += bytearray(self.text, encoding="ascii")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        _write_text(buf, 0x03, self.text)
 
     @classmethod
     def name(cls) -> list[str]:
@@ -242,11 +339,9 @@ class InstrumentName(_MetaEvnet):
     #: str: Instrument Name
     text: str = ""
 
-    def __bytes__(self):
-        byte_datas = b"\x04"
-        byte_datas += int(len(self.text)).to_bytes(1, "big")
-        byte_datas += bytearray(self.text, encoding="ascii")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        _write_text(buf, 0x04, self.text)
 
     @classmethod
     def name(cls):
@@ -260,11 +355,9 @@ class Lyric(_MetaEvnet):
     #: str: Lyric
     text: str = ""
 
-    def __bytes__(self):
-        byte_datas = b"\x05"
-        byte_datas += int(len(self.text)).to_bytes(1, "big")
-        byte_datas += bytearray(self.text, encoding="ascii")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        _write_text(buf, 0x05, self.text)
 
     @classmethod
     def name(cls) -> list[str]:
@@ -275,8 +368,11 @@ class Lyric(_MetaEvnet):
 class EndOfTrack(_MetaEvnet):
     """end of track"""
 
-    def __bytes__(self):
-        return super().__bytes__() + b"\x2F\x00"
+    priority: ClassVar[int] = 4
+
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += b"\x2F\x00"
 
     @classmethod
     def name(cls) -> list[str]:
@@ -290,11 +386,10 @@ class SetTempo(_MetaEvnet):
     #: str: Quarter note microsecond unit time
     value: str = "500000"
 
-    def __bytes__(self):
-        byte_datas = b"\x51"
-        byte_datas += b"\x03"
-        byte_datas += int(self.value).to_bytes(3, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += b"\x51\x03"
+        buf += int(self.value).to_bytes(3, "big")
 
     @classmethod
     def name(cls) -> list[str]:
@@ -314,18 +409,10 @@ class TimeSignature(_MetaEvnet):
     #: str:
     bb: str = "8"
 
-    def __post_init__(self, bar, tick) -> None:
-        _SmfEvent.set_rhythm(int(self.nn), int(self.dd))
-        return super().__post_init__(bar, tick)
-
-    def __bytes__(self):
-        byte_datas = b"\x58"
-        byte_datas += b"\x04"
-        byte_datas += int(self.nn).to_bytes(1, "big")
-        byte_datas += int(self.dd).to_bytes(1, "big")
-        byte_datas += int(self.cc).to_bytes(1, "big")
-        byte_datas += int(self.bb).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += b"\x58\x04"
+        buf += bytes((int(self.nn), int(self.dd), int(self.cc), int(self.bb)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -341,12 +428,11 @@ class KeySignature(_MetaEvnet):
     #: str: 0 is major, 1 is minor
     mi: str = "0"
 
-    def __bytes__(self):
-        byte_datas = b"\x59"
-        byte_datas += b"\x02"
-        byte_datas += int(self.sf).to_bytes(1, "big", signed=True)
-        byte_datas += int(self.mi).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += b"\x59\x02"
+        buf += int(self.sf).to_bytes(1, "big", signed=True)
+        buf.append(int(self.mi))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -357,8 +443,10 @@ class KeySignature(_MetaEvnet):
 class _SystemExclusiveEvent(_SmfEvent):
     """_SystemExclusiveEvent is the base class of "Sysex Event"."""
 
-    def __bytes__(self):
-        return super().__bytes__() + b"\xF0"
+    priority: ClassVar[int] = 0
+
+    def write(self, buf: bytearray) -> None:
+        buf.append(0xF0)
 
     @classmethod
     def name(cls) -> list[str]:
@@ -369,8 +457,9 @@ class _SystemExclusiveEvent(_SmfEvent):
 class GmSystemOn(_SystemExclusiveEvent):
     """GM System Level 1."""
 
-    def __bytes__(self):
-        return super().__bytes__() + b"\x05\x7E\x7F\x09\x01\xF7"
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += b"\x05\x7E\x7F\x09\x01\xF7"
 
     @classmethod
     def name(cls) -> list[str]:
@@ -381,9 +470,6 @@ class GmSystemOn(_SystemExclusiveEvent):
 class _MidiEvent(_SmfEvent):
     """_MidiEvent is the base class of "Midi Event"."""
 
-    def __bytes__(self):
-        return super().__bytes__()
-
     @classmethod
     def name(cls) -> list[str]:
         return super().name() + ["Midi Event"]
@@ -393,6 +479,8 @@ class _MidiEvent(_SmfEvent):
 class NoteOn(_MidiEvent):
     """NoteOn is "Note On"."""
 
+    priority: ClassVar[int] = 3
+
     #: str: channel
     n: str = "0"
     #: str: key number
@@ -402,11 +490,18 @@ class NoteOn(_MidiEvent):
     #: str: duration
     dr: str = "100"
 
-    def __bytes__(self):
-        byte_datas = (0x90 + int(self.n, 0)).to_bytes(1, "big")
-        byte_datas += int(self.kk, 0).to_bytes(1, "big")
-        byte_datas += int(self.vv, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        buf += bytes((0x90 + int(self.n, 0), int(self.kk, 0), int(self.vv, 0)))
+
+    def records(self) -> tuple:
+        """Encode the note on and its note off into compact records.
+
+        :return: note on record, note off record
+        """
+        note_on = self.record()
+        data = bytes((0x80 | (note_on.data[0] & 0x0F), note_on.data[1], 0x20))
+        event_time = self.event_time + int(self.dr)
+        return (note_on, EventRecord(event_time, NoteOffAfterOn.priority, data))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -417,6 +512,8 @@ class NoteOn(_MidiEvent):
 class NoteOffAfterOn(_MidiEvent):
     """NoteOffAfterOn is "Note off"."""
 
+    priority: ClassVar[int] = 1
+
     #: str: channel
     n: str = "0"
     #: str: key number
@@ -424,11 +521,8 @@ class NoteOffAfterOn(_MidiEvent):
     #: str: velocity
     vv: str = "0x20"
 
-    def __bytes__(self):
-        byte_datas = (0x80 + int(self.n, 0)).to_bytes(1, "big")
-        byte_datas += int(self.kk, 0).to_bytes(1, "big")
-        byte_datas += int(self.vv, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        buf += bytes((0x80 + int(self.n, 0), int(self.kk, 0), int(self.vv, 0)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -442,9 +536,8 @@ class _ControlChange(_MidiEvent):
     #: str: channel
     n: str = "0"
 
-    def __bytes__(self):
-        byte_datas = (0xB0 + int(self.n, 0)).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        buf.append(0xB0 + int(self.n, 0))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -458,10 +551,9 @@ class ModulationWheel(_ControlChange):
     #: str: value
     vv: str = "0"
 
-    def __bytes__(self):
-        byte_datas = (0x01).to_bytes(1, "big")
-        byte_datas += int(self.vv, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += bytes((0x01, int(self.vv, 0)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -475,10 +567,9 @@ class ChannelVolume(_ControlChange):
     #: str: value
     vv: str = "0x70"
 
-    def __bytes__(self):
-        byte_datas = (0x07).to_bytes(1, "big")
-        byte_datas += int(self.vv, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += bytes((0x07, int(self.vv, 0)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -492,10 +583,9 @@ class Pan(_ControlChange):
     #: str:
     vv: str = "0x40"
 
-    def __bytes__(self):
-        byte_datas = (0x0A).to_bytes(1, "big")
-        byte_datas += int(self.vv, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += bytes((0x0A, int(self.vv, 0)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -509,10 +599,9 @@ class Expression(_ControlChange):
     #: str: value
     vv: str = "0x70"
 
-    def __bytes__(self):
-        byte_datas = (0x0B).to_bytes(1, "big")
-        byte_datas += int(self.vv, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += bytes((0x0B, int(self.vv, 0)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -523,10 +612,9 @@ class Expression(_ControlChange):
 class SustainOn(_ControlChange):
     """SustaionOn is ***."""
 
-    def __bytes__(self):
-        byte_datas = (0x40).to_bytes(1, "big")
-        byte_datas += (0x40).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += bytes((0x40, 0x40))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -537,10 +625,9 @@ class SustainOn(_ControlChange):
 class SustainOff(_ControlChange):
     """SustaionOff is ***."""
 
-    def __bytes__(self):
-        byte_datas = (0x40).to_bytes(1, "big")
-        byte_datas += (0x00).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += bytes((0x40, 0x00))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -554,9 +641,8 @@ class _ChannelMode(_MidiEvent):
     #: str: channel
     n: str = "0"
 
-    def __bytes__(self):
-        byte_datas = (0xB0 + int(self.n, 0)).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        buf.append(0xB0 + int(self.n, 0))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -567,10 +653,9 @@ class _ChannelMode(_MidiEvent):
 class ResetAllControllers(_ChannelMode):
     """ResetAllControllers is ***."""
 
-    def __bytes__(self):
-        byte_datas = (0x79).to_bytes(1, "big")
-        byte_datas += (0x00).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += bytes((0x79, 0x00))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -581,10 +666,9 @@ class ResetAllControllers(_ChannelMode):
 class AllNotesOff(_ChannelMode):
     """AllNoteOff is "all notes off message"."""
 
-    def __bytes__(self):
-        byte_datas = (0x7B).to_bytes(1, "big")
-        byte_datas += (0x00).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        super().write(buf)
+        buf += bytes((0x7B, 0x00))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -600,10 +684,8 @@ class ProgramChange(_MidiEvent):
     #: str: preset number
     vv: str = "0"
 
-    def __bytes__(self):
-        byte_datas = (0xC0 + int(self.n, 0)).to_bytes(1, "big")
-        byte_datas += int(self.vv, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        buf += bytes((0xC0 + int(self.n, 0), int(self.vv, 0)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -619,10 +701,8 @@ class ChannelPressure(_MidiEvent):
     #: int: threshold
     vv: str = "100"
 
-    def __bytes__(self):
-        byte_datas = (0xD0 + int(self.n, 0)).to_bytes(1, "big")
-        byte_datas += int(self.vv, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        buf += bytes((0xD0 + int(self.n, 0), int(self.vv, 0)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -640,11 +720,8 @@ class PitchWheelChange(_MidiEvent):
     #: str: MSB, centre(non-effect) is 0x40
     mm: str = "0x40"
 
-    def __bytes__(self):
-        byte_datas = (0xE0 + int(self.n, 0)).to_bytes(1, "big")
-        byte_datas += int(self.ll, 0).to_bytes(1, "big")
-        byte_datas += int(self.mm, 0).to_bytes(1, "big")
-        return super().__bytes__() + byte_datas
+    def write(self, buf: bytearray) -> None:
+        buf += bytes((0xE0 + int(self.n, 0), int(self.ll, 0), int(self.mm, 0)))
 
     @classmethod
     def name(cls) -> list[str]:
@@ -657,26 +734,70 @@ def _convert_to_variable_length_quantity(n: int) -> bytes:
     :param int n: delta time
     :return: variable length quantity
     """
+    quantity: list[int] = [n & 0x7F]
+    n >>= 7
+    while n:
+        quantity.append((n & 0x7F) | 0x80)
+        n >>= 7
+    return bytes(reversed(quantity))
 
-    def base_decimal(base: int, n: int) -> list[int]:
-        """Convert to a base-decimal.
 
-        :param int base: base
-        :param int n: taget number
-        :return: Converted value stored in list[int]
-        """
+def variable_length_quantities(values: np.ndarray) -> tuple:
+    """Convert many numbers to "variable length quantity" at once.
+
+    :param numpy.ndarray values: numbers less than 0x10000000
+    :return: concatenated quantities, and the offset of each quantity in them
+        with the end appended
+    """
+    values = np.asarray(values, dtype=np.uint32)
+    if len(values) and values.max() >= 0x10000000:
+        raise SmfError("variable length quantity is limited to 0x0FFFFFFF")
+    # 4 bytes per value, most significant first, continuation bit set but last
+    shifts = np.array([21, 14, 7, 0], dtype=np.uint32)
+    digits = ((values[:, None] >> shifts) & 0x7F).astype(np.uint8)
+    digits[:, :3] |= 0x80
+    sizes = 1 + (values >= 1 << 7) + (values >= 1 << 14) + (values >= 1 << 21)
+    used = np.arange(4) >= (4 - sizes)[:, None]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    return (digits[used].tobytes(), offsets.tolist())
+
+
+def _write_text(buf: bytearray, meta_type: int, text: str) -> None:
+    """Append meta type, length and text of a text meta event.
+
+    :param bytearray buf: buffer
+    :param int meta_type: meta type
+    :param str text: text
+    """
+    data = text.encode("ascii")
+    buf.append(meta_type)
+    buf += _convert_to_variable_length_quantity(len(data))
+    buf += data
 
-        if n < base:
-            return [n]
-        else:
-            digit: list = base_decimal(base, n // base)
-        return digit + [n % base]
 
-    quantity: list[int] = base_decimal(2**7, n)
+def write_track(smf: BinaryIO, trk: list, buf: bytearray) -> None:
+    """Write a <Track Chunk> of sorted events.
 
-    for i in range(len(quantity) - 1):
-        quantity[i] = quantity[i] + 0x80
-    return bytes(quantity)
+    Each event is serialised once into "buf", and the chunk length is
+    patched in afterwards.
+
+    :param BinaryIO smf: MID file opened for writing
+    :param list trk: events or records sorted by time
+    :param bytearray buf: working buffer, reused between tracks
+    """
+    event_times = np.fromiter((ev.event_time for ev in trk), np.int64, len(trk))
+    quantities, offsets = variable_length_quantities(
+        np.diff(event_times, prepend=0)
+    )
+
+    del buf[:]
+    buf += b"MTrk\x00\x00\x00\x00"
+    for i, ev in enumerate(trk):
+        buf += quantities[offsets[i] : offsets[i + 1]]
+        ev.write(buf)
+    struct.pack_into(">" "L", buf, 4, len(buf) - 8)
+    smf.write(buf)
 
 
 def event_classes() -> set:
@@ -693,22 +814,28 @@ def event_classes() -> set:
     return sub_classes(_SmfEvent)
 
 
+#: dict: {event names: event class} of the public event classes, built at import
+EVENT_TABLE: dict = {
+    tuple(data_class.name()): data_class
+    for data_class in event_classes()
+    if not match("_", data_class.__name__)
+}
+# numbers of event names, longest first
+_NAME_LENGTHS: list = sorted({len(names) for names in EVENT_TABLE}, reverse=True)
+
+
 def event_data(params: list) -> object:
     """Convert CSV data list to event data object.
 
     :param list params: csv data list
-    :return: event data object
+    :return: event data object, None if the event is unknown
     """
-    n_name: int
-    data_classes: set = event_classes()
-
-    for data_class in data_classes:
-        if not match("_", data_class.__name__):
-            if set(data_class.name()) <= set(params):
-                n_name = len(data_class.name())
-                return data_class(
-                    params[0], params[1], params[2], *tuple(params[3 + n_name :])
-                )
+    for n_name in _NAME_LENGTHS:
+        data_class = EVENT_TABLE.get(tuple(params[3 : 3 + n_name]))
+        if data_class is not None:
+            return data_class(
+                params[0], params[1], params[2], *tuple(params[3 + n_name :])
+            )
 
     return None
 
@@ -717,47 +844,61 @@ def generate(csvfile: str, midifile: str) -> None:
     """Generate a MID file from a CSV file.
 
     :param str csvfile: CSV filename to be converted.
-    :param str midifile: MID filename to be created.
+    :param str midifile: MID filename to be created, only if converted.
+    """
+    data = generate_bytes(csvfile)  # the file is not touched if this fails
+    with open(file=midifile, mode="wb") as smf:
+        smf.write(data)
+
+
+def generate_bytes(csvfile: str) -> bytes:
+    """Generate SMF(Standard MIDI File) data in memory from a CSV file.
+
+    :param str csvfile: CSV filename to be converted.
+    :return: SMF data, for FS.MidiPlayer "standardmidibuffer"
     """
+    with BytesIO() as smf:
+        write_smf(csvfile, smf)
+        return smf.getvalue()
+
+
+def write_smf(csvfile: str, smf: BinaryIO) -> None:
+    """Convert a CSV file and write the SMF(Standard MIDI File) data.
 
-    csv_datas: list = []
+    :param str csvfile: CSV filename to be converted.
+    :param BinaryIO smf: binary stream opened for writing
+    """
+    csv_tracks: dict = dict()  # {track name: [csv line]}, in order of appearance
+    signatures: list = list()  # [(bar, nn, dd)] of "Time Signature"
     with open(file=csvfile, mode="rt") as f:
         for line in csv.reader(f, dialect="unix"):
-            csv_datas.append(line)
+            csv_tracks.setdefault(line[0], []).append(line)
+            if line[3:5] == ["Meta Event", "Time Signature"]:
+                if int(line[2]) != 0:
+                    raise SmfError(f"time signature inside a bar: {line}")
+                signatures.append((int(line[1]), int(line[5]), int(line[6])))
 
-    track_names: list = list(map(lambda x: x[0], csv_datas))
-    track_names = sorted(set(track_names), key=track_names.index)
-    header = HeaderChunk(format=1, ntrks=len(track_names), division=480)
+    header = HeaderChunk(format=1, ntrks=len(csv_tracks), division=480)
+    _SmfEvent.set_bars(BarTable(signatures, header.division))
 
     tracks: list = []
-    for i in range(len(track_names)):
-        tracks.append([])
-        for line in csv_datas:
-            if line[0] == track_names[i]:
-                tracks[i].append(event_data(line))
-
-    for trk in tracks:
-        for ev in trk:
+    for lines in csv_tracks.values():
+        trk: list = []
+        for line in lines:
+            ev = event_data(line)
+            if ev is None:
+                raise SmfError(f"unknown event: {line}")
             if isinstance(ev, NoteOn):
-                note_off = NoteOffAfterOn(track=ev.track, n=ev.n, kk=ev.kk)
-                note_off.event_time = ev.event_time + int(ev.dr)
-                trk.append(note_off)
-
-        trk.sort()
-        trk[0].set_delta_time = trk[0].event_time
-        for i in range(1, len(trk)):
-            trk[i].set_delta_time(trk[i - 1].event_time)
-
-    with open(file=midifile, mode="wb") as smf:
-        smf.write(bytes(header))
-        for trk in tracks:
-            smf.write(
-                struct.pack(
-                    ">" "4s" "L", b"MTrk", sum(list(map(len, (map(bytes, trk)))))
-                )
-            )
-            for ev in trk:
-                smf.write(bytes(ev))
+                trk += ev.records()
+            else:
+                trk.append(ev.record())
+        trk.sort(key=EventRecord.key)
+        tracks.append(trk)
+
+    buf = bytearray()
+    smf.write(bytes(header))
+    for trk in tracks:
+        write_track(smf, trk, buf)
 
 
 if __name__ == "__main__":
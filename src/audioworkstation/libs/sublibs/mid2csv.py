@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Generate a CSV file from a MID(Standard MIDI File) file.
+
+The inverse of :func:`csv2mid.generate`, the CSV format is described in
+:mod:`csv2mid`. The MID file is read a chunk at a time by
+:class:`paramsmid.SmfStreamParser` and the CSV lines are written as they are
+made, so memory does not grow with the size of the file. Only the lines
+after a "Note On" whose note off is not read yet are held back.
+
+restrictions
+    #. Events without a CSV form, e.g. "Bank Select", are left out.
+    #. Tracks are named "Track0", "Track1", ... in file order.
+    #. Ticks are scaled to the division 480 of the CSV format.
+    #. "Time Signature" inside a bar is moved to the start of the next bar.
+"""
+
+import csv
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Iterator, Union
+
+from . import csv2mid as C2M
+from . import paramsmid as PMID
+
+#: int: ticks per quarter-note of the CSV format
+DIVISION = 480
+
+# {meta type: event names} of the text meta events
+_TEXTS = {
+    0x01: C2M.TextEvent.name(),
+    0x02: C2M.CopyrightNotice.name(),
+    0x03: C2M.SequencerTrackName.name(),
+    0x04: C2M.InstrumentName.name(),
+    0x05: C2M.Lyric.name(),
+}
+# {controller number: event names} of "Control Change" and "Channel Mode"
+_CONTROLS = {
+    0x01: C2M.ModulationWheel.name(),
+    0x07: C2M.ChannelVolume.name(),
+    0x0A: C2M.Pan.name(),
+    0x0B: C2M.Expression.name(),
+    0x79: C2M.ResetAllControllers.name(),
+    0x7B: C2M.AllNotesOff.name(),
+}
+# sysex payload of "GM System On"
+_GM_SYSTEM_ON = b"\x7E\x7F\x09\x01\xF7"
+
+
+def generate(midifile: str, csvfile: str, chunk_size: int = 65536) -> None:
+    """Generate a CSV file from a MID file.
+
+    :param str midifile: MID filename to be converted.
+    :param str csvfile: CSV filename to be created.
+    :param int chunk_size: bytes read from the MID file at a time
+    """
+    with open(file=csvfile, mode="wt", newline="") as f:
+        csv.writer(f, dialect="unix").writerows(csv_lines(Path(midifile), chunk_size))
+
+
+def csv_lines(midifile: Path, chunk_size: int = 65536) -> Iterator[list]:
+    """CSV lines of a MID file, track by track.
+
+    :param Path midifile: MID file
+    :param int chunk_size: bytes read at a time
+    :return: CSV data lists
+    """
+    parser = PMID.SmfStreamParser()
+    with midifile.open("rb") as f:
+        yield from _lines(_scaled(_events(parser, f, chunk_size), parser))
+
+
+def _events(parser: PMID.SmfStreamParser, f, chunk_size: int) -> Iterator[tuple]:
+    """Events of a binary file, in file order.
+
+    :param SmfStreamParser parser: parser of the file
+    :param f: binary file
+    :param int chunk_size: bytes read at a time
+    :return: :data:`paramsmid.SmfEvent`
+    """
+    for data in iter(lambda: f.read(chunk_size), b""):
+        parser.feed(data)
+        yield from parser.events()
+
+
+def _scaled(events: Iterable, parser: PMID.SmfStreamParser) -> Iterator[tuple]:
+    """Events with the tick scaled to :data:`DIVISION`.
+
+    :param Iterable events: :data:`paramsmid.SmfEvent`
+    :param SmfStreamParser parser: parser of the events, for the division
+    :return: :data:`paramsmid.SmfEvent`
+    """
+    division = 0
+    for event in events:
+        if not division:
+            division = parser.header[4]  # read before the first track
+            if division & 0x8000:
+                raise C2M.SmfError("SMPTE time division is not supported")
+        if division != DIVISION:
+            event = event._replace(tick=event.tick * DIVISION // division)
+        yield event
+
+
+def _lines(events: Iterable) -> Iterator[list]:
+    """CSV lines of the events, with bar number and tick in bar.
+
+    :param Iterable events: :data:`paramsmid.SmfEvent` in file order
+    :return: CSV data lists
+    """
+    signatures: list = list()
+    bars = C2M.BarTable()
+    track: Union[_TrackLines, None] = None
+
+    for event in events:
+        if track is None or event.track != track.number:
+            if track is not None:
+                track.close(tick)
+                yield from _bar_lines(track, bars)
+            track = _TrackLines(event.track)
+        tick = event.tick
+
+        if event.status == 0x90 and event.data2:
+            track.note_on(tick, event.channel, event.data1, event.data2)
+        elif event.status in (0x80, 0x90):
+            track.note_off(tick, event.channel, event.data1, event.data2)
+        elif event.status == 0xFF and event.data1 == 0x58 and len(event.data) >= 4:
+            bar, ticks = bars.bar(tick)
+            if ticks:
+                bar += 1
+            signatures.append((bar, event.data[0], event.data[1]))
+            bars = C2M.BarTable(signatures, DIVISION)
+            track.add(bars.tick(bar), C2M.TimeSignature.name() + list(event.data[:4]))
+        else:
+            if event.status == 0xFF and event.data1 == 0x2F:
+                track.close(tick)
+            names = _names_values(event)
+            if names is not None:
+                track.add(tick, names)
+        yield from _bar_lines(track, bars)
+
+    if track is not None:
+        track.close(tick)
+        yield from _bar_lines(track, bars)
+
+
+def _bar_lines(track: "_TrackLines", bars: C2M.BarTable) -> Iterator[list]:
+    """Complete CSV lines of a track, ticks converted to bar and tick in bar.
+
+    :param _TrackLines track: lines of the track
+    :param BarTable bars: bars of the file
+    :return: CSV data lists
+    """
+    for tick, names in track.ready():
+        yield [track.name, *bars.bar(tick), *names]
+
+
+def _names_values(event: tuple) -> Union[list, None]:
+    """Event names and values of an event other than note and time signature.
+
+    :param tuple event: :data:`paramsmid.SmfEvent`
+    :return: CSV event list and value list, None if the event has no CSV form
+    """
+    status, data1, data2, data = event.status, event.data1, event.data2, event.data
+    if status == 0xFF:
+        if data1 in _TEXTS:
+            return _TEXTS[data1] + [data.decode("ascii", "backslashreplace")]
+        if data1 == 0x2F:
+            return C2M.EndOfTrack.name()
+        if data1 == 0x51:
+            return C2M.SetTempo.name() + [int.from_bytes(data, "big")]
+        if data1 == 0x59 and len(data) >= 2:
+            sf = int.from_bytes(data[:1], "big", signed=True)
+            return C2M.KeySignature.name() + [sf, data[1]]
+    elif status == 0xF0:
+        if data == _GM_SYSTEM_ON:
+            return C2M.GmSystemOn.name()
+    elif status == 0xB0:
+        if data1 in (0x01, 0x07, 0x0A, 0x0B):
+            return _CONTROLS[data1] + [event.channel, data2]
+        if data1 in _CONTROLS:
+            return _CONTROLS[data1] + [event.channel]
+        if data1 == 0x40:
+            sustain = C2M.SustainOn if data2 >= 64 else C2M.SustainOff
+            return sustain.name() + [event.channel]
+    elif status == 0xC0:
+        return C2M.ProgramChange.name() + [event.channel, data1]
+    elif status == 0xD0:
+        return C2M.ChannelPressure.name() + [event.channel, data1]
+    elif status == 0xE0:
+        return C2M.PitchWheelChange.name() + [event.channel, data1, data2]
+    return None
+
+
+class _TrackLines:
+    """Lines of a track, held back until the durations of earlier notes are known.
+
+    :param int number: track number
+    """
+
+    def __init__(self, number: int) -> None:
+        #: int: track number
+        self.number: int = number
+        #: str: track name
+        self.name: str = f"Track{number}"
+        self._lines: deque = deque()  # [tick, names], duration None until note off
+        self._notes: dict = dict()  # {(channel, key): deque of "Note On" lines}
+
+    def add(self, tick: int, names: list) -> None:
+        self._lines.append([tick, names])
+
+    def note_on(self, tick: int, channel: int, key: int, velocity: int) -> None:
+        line = [tick, C2M.NoteOn.name() + [channel, key, velocity, None]]
+        self._lines.append(line)
+        self._notes.setdefault((channel, key), deque()).append(line)
+
+    def note_off(self, tick: int, channel: int, key: int, velocity: int) -> None:
+        notes = self._notes.get((channel, key))
+        if notes:
+            line = notes.popleft()
+            line[1][-1] = tick - line[0]
+        else:
+            self.add(tick, C2M.NoteOffAfterOn.name() + [channel, key, velocity])
+
+    def close(self, tick: int) -> None:
+        """End the notes still on.
+
+        :param int tick: end of the track
+        """
+        for notes in self._notes.values():
+            for line in notes:
+                line[1][-1] = tick - line[0]
+        self._notes.clear()
+
+    def ready(self) -> Iterator[list]:
+        """Take out the lines up to the first note without its duration.
+
+        :return: [tick, names], ...
+        """
+        lines = self._lines
+        while lines and lines[0][1][-1] is not None:
+            yield lines.popleft()
+
+
+if __name__ == "__main__":
+    print(__file__)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Persistent index of MIDI files.
+
+Information on each SMF(Standard MIDI File) is kept in a SQLite database,
+keyed by path, modification time and size. Unchanged files are served from the
+database, only new or modified files are parsed again.
+
+New or modified files can be scanned in worker processes by LibraryScanner.
+"""
+
+import sqlite3
+from concurrent import futures
+from functools import partial
+from json import dumps, loads
+from multiprocessing import get_context
+from os import cpu_count, stat_result
+from pathlib import Path
+from typing import Callable, Union
+
+from . import paramsmid as PMID
+
+#: tuple: items kept for each MIDI file
+INDEX_ITEMS = (
+    "title",
+    "total_tick",
+    "channels_preset",
+    "instruments",
+    "lyrics_count",
+    "tempo_map",
+)
+#: int: version of the table layout, a database of another version is rebuilt
+SCHEMA_VERSION = 1
+#: int: worker processes, one core of a 4-core Raspberry Pi is left for audio and UI
+MAX_WORKERS = max(1, min(3, (cpu_count() or 1) - 1))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS midifile (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    total_tick INTEGER NOT NULL,
+    channels_preset TEXT NOT NULL,
+    instruments TEXT NOT NULL,
+    lyrics_count INTEGER NOT NULL,
+    tempo_map TEXT NOT NULL
+)
+"""
+
+
+def scan(midifile: Path) -> dict:
+    """Scan the items kept in the index from a MIDI file.
+
+    :param Path midifile: target MIDI file
+    :return: keywords: :data:`INDEX_ITEMS`
+    """
+    return PMID.scan_metadata(midifile, INDEX_ITEMS)
+
+
+class MidiLibrary:
+    """MidiLibrary keeps information on MIDI files in a SQLite database.
+
+    :param str database: database filename
+    """
+
+    def __init__(self, database: str = "config/midilibrary.db") -> None:
+        self._connection = sqlite3.connect(database)
+        with self._connection:
+            (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+            if version != SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS midifile")
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._connection.execute(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+    def info(self, midifile: Path) -> dict:
+        """Returns information about the MIDI file, parsing it only if changed.
+
+        :param Path midifile: target MIDI file
+        :return: keywords: :data:`INDEX_ITEMS`
+        """
+        stat = midifile.stat()
+        items = self.lookup(midifile, stat)
+        if items is None:
+            items = scan(midifile)
+            self.store(midifile, items, stat)
+        return items
+
+    def lookup(
+        self, midifile: Path, stat: Union[stat_result, None] = None
+    ) -> Union[dict, None]:
+        """Returns the indexed information if the MIDI file is unchanged.
+
+        :param Path midifile: target MIDI file
+        :param os.stat_result stat: status of the file, or None to read it
+        :return: keywords: :data:`INDEX_ITEMS`, or None if not indexed or changed
+        """
+        if stat is None:
+            stat = midifile.stat()
+        row = self._connection.execute(
+            "SELECT title, total_tick, channels_preset, instruments, lyrics_count,"
+            " tempo_map FROM midifile WHERE path = ? AND mtime_ns = ? AND size = ?",
+            (str(midifile), stat.st_mtime_ns, stat.st_size),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "title": row[0],
+            "total_tick": row[1],
+            "channels_preset": loads(row[2]),
+            "instruments": loads(row[3]),
+            "lyrics_count": row[4],
+            "tempo_map": PMID.TempoMap(*loads(row[5])),
+        }
+
+    def store(
+        self, midifile: Path, items: dict, stat: Union[stat_result, None] = None
+    ) -> None:
+        """Store information about the MIDI file.
+
+        :param Path midifile: target MIDI file
+        :param dict items: keywords: :data:`INDEX_ITEMS`
+        :param os.stat_result stat: status of the file when it was scanned
+        """
+        if stat is None:
+            stat = midifile.stat()
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO midifile VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(midifile),
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    items["title"],
+                    items["total_tick"],
+                    dumps(items["channels_preset"]),
+                    dumps(items["instruments"], ensure_ascii=False),
+                    items["lyrics_count"],
+                    dumps(items["tempo_map"].arguments),
+                ),
+            )
+
+    def prune(self, midifiles: list) -> int:
+        """Remove MIDI files that no longer exist from the index.
+
+        :param list midifiles: existing MIDI files
+        :return: number of removed files
+        """
+        paths = set(map(str, midifiles))
+        removed = [
+            (path,)
+            for (path,) in self._connection.execute("SELECT path FROM midifile")
+            if path not in paths
+        ]
+        with self._connection:
+            self._connection.executemany("DELETE FROM midifile WHERE path = ?", removed)
+        return len(removed)
+
+
+class LibraryScanner:
+    """LibraryScanner scans MIDI files in worker processes.
+
+    Each file is delivered as soon as it is scanned, so a slow or corrupt file
+    does not hold back the others.
+
+    :param Callable done: called as done(midifile, stat, items, error) from a
+        thread of the executor. "items" is None and "error" is the exception if
+        the file could not be scanned.
+    :param int max_workers: number of worker processes
+    """
+
+    def __init__(
+        self,
+        done: Callable[..., None],
+        max_workers: int = MAX_WORKERS,
+    ) -> None:
+        self._done = done
+        self._max_workers = max_workers
+        self._executor: Union[futures.ProcessPoolExecutor, None] = None
+        self._cancelled: bool = False
+
+    def submit(self, midifile: Path) -> None:
+        """Scan a MIDI file in a worker process.
+
+        :param Path midifile: target MIDI file
+        """
+        if self._cancelled:
+            return
+        if self._executor is None:
+            # "spawn": workers do not inherit the audio and UI threads
+            self._executor = futures.ProcessPoolExecutor(
+                max_workers=self._max_workers, mp_context=get_context("spawn")
+            )
+        stat = midifile.stat()
+        future = self._executor.submit(scan, midifile)
+        future.add_done_callback(partial(self._deliver, midifile, stat))
+
+    def cancel(self) -> None:
+        """Cancel pending scans, scans in progress are no longer delivered."""
+        self._cancelled = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _deliver(
+        self, midifile: Path, stat: stat_result, future: futures.Future
+    ) -> None:
+        if self._cancelled or future.cancelled():
+            return
+        error = future.exception()
+        self._done(midifile, stat, None if error else future.result(), error)
+
+
+if __name__ == "__main__":
+    print(__file__)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Presets of SoundFont files, read without a synthesizer.
+
+A SF2/SF3 file is a RIFF file, the presets are the "phdr" chunk of its "pdta"
+list. The chunk is read through mmap, the sample data is not touched. The
+presets of each file are kept in a JSON index, keyed by path, modification
+time and size, only new or modified files are read again.
+"""
+
+from json import dump, load
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+from struct import Struct
+from typing import Iterator, Union
+
+#: Struct: sfPresetHeader, name, preset, bank, bag index, library, genre, morphology
+PRESET_HEADER = Struct("<20sHHHIII")
+#: int: bank of the percussion presets
+PERCUSSION_BANK = 128
+
+_CHUNK = Struct("<4sI")
+
+
+class Sf2Error(Exception):
+    """Not a SoundFont file, or a broken one."""
+
+    pass
+
+
+def _chunks(buffer: mmap, start: int, end: int) -> Iterator[tuple]:
+    """Chunks of a RIFF file, the sub-chunks of a list.
+
+    :param mmap buffer: RIFF file
+    :param int start: offset of the first chunk
+    :param int end: offset of the end of the chunks
+    :return: (chunk id, offset of the data, size of the data)
+    """
+    offset = start
+    while offset + _CHUNK.size <= end:
+        chunk_id, size = _CHUNK.unpack_from(buffer, offset)
+        offset += _CHUNK.size
+        if offset + size > end:
+            raise Sf2Error(f"chunk {chunk_id!r} overruns at {offset}")
+        yield chunk_id, offset, size
+        offset += size + (size & 1)  # padded to even
+
+
+def _lists(buffer: mmap) -> dict:
+    """LIST chunks of a "sfbk" RIFF file.
+
+    :param mmap buffer: RIFF file
+    :return: {list type: (offset of the sub-chunks, offset of their end)}
+    """
+    if len(buffer) < 12 or buffer[0:4] != b"RIFF" or buffer[8:12] != b"sfbk":
+        raise Sf2Error("not a SoundFont file")
+    end = min(len(buffer), 8 + _CHUNK.unpack_from(buffer, 0)[1])
+    result: dict = dict()
+    for chunk_id, offset, size in _chunks(buffer, 12, end):
+        if chunk_id == b"LIST" and size >= 4:
+            result[bytes(buffer[offset : offset + 4])] = (offset + 4, offset + size)
+    return result
+
+
+def _text(data: bytes) -> str:
+    return data.split(b"\0", 1)[0].decode(errors="replace")
+
+
+def scan(soundfont: Path) -> dict:
+    """Read the name and the presets of a SoundFont file.
+
+    :param Path soundfont: SF2/SF3 file
+    :return: keywords: "name", "presets" - [[bank, num, name], ...] in file order
+    """
+    result: dict = {"name": "", "presets": []}
+    with open(soundfont, "rb") as f:
+        try:
+            buffer = mmap(f.fileno(), 0, access=ACCESS_READ)
+        except ValueError as msg:  # empty file
+            raise Sf2Error(f"{soundfont}: {msg}") from None
+        with buffer:
+            lists = _lists(buffer)
+            if b"pdta" not in lists:
+                raise Sf2Error(f"{soundfont}: no pdta list")
+            for chunk_id, offset, size in _chunks(buffer, *lists.get(b"INFO", (0, 0))):
+                if chunk_id == b"INAM":
+                    result["name"] = _text(buffer[offset : offset + size])
+            for chunk_id, offset, size in _chunks(buffer, *lists[b"pdta"]):
+                if chunk_id != b"phdr":
+                    continue
+                # the last record "EOP" terminates the presets
+                for i in range(size // PRESET_HEADER.size - 1):
+                    name, num, bank, *_ = PRESET_HEADER.unpack_from(
+                        buffer, offset + i * PRESET_HEADER.size
+                    )
+                    result["presets"] += [[bank, num, _text(name)]]
+                return result
+    raise Sf2Error(f"{soundfont}: no phdr chunk")
+
+
+class PresetIndex:
+    """PresetIndex keeps the presets of SoundFont files in a JSON file.
+
+    :param str index: index filename
+    """
+
+    def __init__(self, index: str = "config/sf2index.json") -> None:
+        self._filename = Path(index)
+        try:
+            with open(self._filename, "rt") as f:
+                self._index: dict = load(f)
+        except (FileNotFoundError, ValueError):
+            self._index = dict()
+
+    def presets(self, soundfont: Union[str, Path]) -> dict:
+        """Returns the presets of the SoundFont file, reading it only if changed.
+
+        :param Path soundfont: SF2/SF3 file
+        :return: keywords: "name", "presets", see :func:`scan`
+        """
+        stat = Path(soundfont).stat()
+        entry = self._index.get(str(soundfont))
+        if (
+            entry is None
+            or entry["mtime_ns"] != stat.st_mtime_ns
+            or entry["size"] != stat.st_size
+        ):
+            entry = dict(
+                scan(Path(soundfont)), mtime_ns=stat.st_mtime_ns, size=stat.st_size
+            )
+            self._index[str(soundfont)] = entry
+            self.save()
+        return {"name": entry["name"], "presets": entry["presets"]}
+
+    def save(self) -> None:
+        """Write the index."""
+        self._filename.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._filename, "wt") as f:
+            dump(self._index, f, ensure_ascii=False)
+
+    def gm_sound_set(self, soundfonts: list) -> tuple:
+        """GM Sound Set and GM Percussion Sound Set of SoundFont files.
+
+        The same as :meth:`fluidsynth.Synthesizer.gm_sound_set` of a synthesizer
+        that loaded the files in order: "sfont_id" counts from 1, and a preset of
+        a file loaded later hides the same preset of the files before it.
+
+        :param list soundfonts: SF2/SF3 files
+        :return: gm sound set - list[PRESET], 128 presets of bank 0
+        :return: gm percussion sound set - list[PRESET], 128 presets of bank 128
+        """
+        empty = {"name": None, "num": None, "bank": None, "sfont_id": None}
+        sound_set = [dict(empty) for _ in range(128)]
+        percussion_sound_set = [dict(empty) for _ in range(128)]
+        sets = {0: sound_set, PERCUSSION_BANK: percussion_sound_set}
+        for sfont_id, soundfont in enumerate(soundfonts, start=1):
+            found: set = set()
+            for bank, num, name in self.presets(soundfont)["presets"]:
+                if bank in sets and num < 128 and (bank, num) not in found:
+                    found.add((bank, num))  # the first of duplicates in a file
+                    sets[bank][num] = {
+                        "name": name,
+                        "num": num,
+                        "bank": bank,
+                        "sfont_id": sfont_id,
+                    }
+        return sound_set, percussion_sound_set
+
+
+if __name__ == "__main__":
+    print(__file__)
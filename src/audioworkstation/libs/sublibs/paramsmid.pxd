@@ -1,30 +1,95 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 '''Directives are not available because of the absence of 'import cython'.'''
+cimport cython
 
 cdef class StandardMidiFile:
 
-    cdef int _last_event_type
     cdef list _header
+    cdef list _chunks
     cdef list _tracks
-    cdef bytes _smf
+    cdef list _tables
+    cdef object _events
+    cdef bint _columnar
+    cdef bint _lazy
+    cdef object _smf
+    cdef object _mmap
 
+    cpdef close(self)
     cpdef list channels_preset(self)
     cpdef str title(self)
     cpdef list instruments(self)
     cpdef list lyrics(self)
     cpdef int total_tick(self)
 
-    cdef tuple _dequeue_as_midi_event(self, int event_type, int offset)
-    cdef tuple _dequeue_as_meta_event(self, int event_type, int offset)
-    cdef tuple _dequeue_as_sysex_event(self, int event_type, int offset)
-    cdef tuple _dequeue_event(self, int offset)
-    # cdef int event_type
+    cdef list _chunk_index(self, int offset)
+    cdef list _lazy_texts(self, int meta_type)
+    cdef _columnar_tracks(self)
+    cdef list _meta_texts(self, object table, int meta_type)
+
     cdef tuple _header_chunk(self)
-    
-    cdef bint _is_status_byte(self, int value)
-    cdef tuple _delta_time(self, int offset)
-    # cdef int delta_time
-    # cdef int temp
+    cdef tuple _unpack(self, int offset, str format)
+
+
+# "data" is the SMF read through a typed memoryview, payloads are sliced from "smf".
+@cython.final
+cdef class _EventDecoder:
+
+    cdef const unsigned char[:] data
+    cdef public Py_ssize_t offset
+    cdef public int running
+    cdef readonly unsigned long long delta_time
+    cdef readonly int status
+    cdef readonly int channel
+    cdef readonly int data1
+    cdef readonly int data2
+    cdef readonly Py_ssize_t start
+    cdef readonly Py_ssize_t length
+
+    @cython.locals(
+        offset=cython.Py_ssize_t,
+        delta_time=cython.ulonglong,
+        value=cython.int,
+        status=cython.int,
+        meta_type=cython.int,
+        running=cython.int,
+        data1=cython.int,
+        data2=cython.int,
+        length=cython.Py_ssize_t,
+    )
+    cpdef int decode(self) except -1
+
+
+@cython.locals(
+    decoder=_EventDecoder,
+    tick=cython.ulonglong,
+    status=cython.int,
+    data1=cython.int,
+)
+cpdef list _decode_list_track(object smf, Py_ssize_t offset, Py_ssize_t end)
+
+@cython.locals(
+    decoder=_EventDecoder,
+    count=cython.Py_ssize_t,
+    index=cython.Py_ssize_t,
+    tick=cython.ulonglong,
+    status=cython.int,
+    ticks=cython.ulonglong[:],
+    statuses=cython.uchar[:],
+    channels=cython.uchar[:],
+    data1s=cython.uchar[:],
+    data2s=cython.uchar[:],
+    offsets=cython.uint[:],
+    lengths=cython.uint[:],
+)
+cpdef object _decode_track(object smf, Py_ssize_t offset, Py_ssize_t end)
 
-    cdef tuple _unpack(self, int offset, str format)
\ No newline at end of file
+@cython.locals(
+    decoder=_EventDecoder,
+    tick=cython.ulonglong,
+    status=cython.int,
+    data1=cython.int,
+)
+cpdef unsigned long long _scan_track(
+    bytes smf, Py_ssize_t offset, Py_ssize_t end, dict metas, object channels, bint walk
+)
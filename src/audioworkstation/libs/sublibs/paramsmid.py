@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+# cython: annotation_typing=False
 """Analyze MIDI files according to  SMF (Standard MIDI File) format.
 
 :reference: MIDI1.0規格書(日本語版98.1) ISBN4-8456-0348-9 C3055
@@ -10,53 +11,131 @@
 
 :Todo: Compile automatically.
 """
+import heapq
+import mmap
 import struct
-from typing import Union
+from bisect import bisect_right
+from collections import namedtuple
+from typing import Iterator, Union
 from pathlib import Path
 
+import numpy as np
+
 FOURCC = ">" "4s"
 CKDR = FOURCC + "L"
 HEADER_CHUNK = CKDR + "HHH"
 BYTE = ">" "B"
 
+#: numpy.dtype: one row of a columnar event table.
+#:
+#: - "tick": absolute tick
+#: - "status": 0x80..0xE0 for MIDI events (channel removed), 0xFF, 0xF0 or 0xF7
+#: - "channel": MIDI channel, 0 for meta and sysex events
+#: - "data1": first data byte, meta type for meta events
+#: - "data2": second data byte
+#: - "offset": payload offset in the file, meta and sysex events only
+#: - "length": payload length, meta and sysex events only
+EVENT_DTYPE = np.dtype(
+    [
+        ("tick", "<u8"),
+        ("status", "u1"),
+        ("channel", "u1"),
+        ("data1", "u1"),
+        ("data2", "u1"),
+        ("offset", "<u4"),
+        ("length", "<u4"),
+    ]
+)
+
+
+#: bool: True when this module is the extension compiled with paramsmid.pxd,
+#: see setup/compile.py. Without it the same code runs as pure Python.
+COMPILED: bool = not __file__.endswith(".py")
+
+#: collections.namedtuple: one event of :meth:`StandardMidiFile.events`.
+#:
+#: - "tick": absolute tick
+#: - "track": track number
+#: - "status", "channel", "data1", "data2": as :data:`EVENT_DTYPE`
+#: - "data": payload of meta and sysex events, empty otherwise
+SmfEvent = namedtuple(
+    "SmfEvent", ("tick", "track", "status", "channel", "data1", "data2", "data")
+)
+
 
 class StandardMidiFile:
     """StandardMidiFile analyzes SMF(Standard MIDI File).
 
-    :param pathlib.Path midifile: target SMF(Standard MIDI File)
+    :param pathlib.Path midifile: target SMF(Standard MIDI File), or its data
+    :param bool columnar: decode each track into a NumPy structured array
+        (:data:`EVENT_DTYPE`) instead of lists of events
+    :param bool use_mmap: map the file instead of reading it, meta and sysex
+        payloads are then memoryview slices of the mapping, see :meth:`close`
+    :param bool lazy: only locate the track chunks, events are decoded while
+        iterating :meth:`events` and each query walks the tracks again
     """
 
-    def __init__(self, midifile: Path) -> None:
+    def __init__(
+        self,
+        midifile: Union[Path, bytes],
+        columnar: bool = False,
+        use_mmap: bool = False,
+        lazy: bool = False,
+    ) -> None:
+        self._mmap: Union[mmap.mmap, None] = None
         self._header: list = list()
+        self._chunks: list = list()
         self._tracks: list = list()
-        self._last_event_type: int = -1
+        self._tables: list = list()
+        self._events: np.ndarray = np.empty(0, dtype=EVENT_DTYPE)
+        self._columnar: bool = columnar and not lazy
+        self._lazy: bool = lazy
 
-        ckID: bytes
-        ckSize: int
         offset: int
-        delta_time: int
-
-        current_tick: int
-        list_event: list
 
-        self._smf: bytes = midifile.read_bytes()
+        self._smf: Union[bytes, memoryview]
+        if isinstance(midifile, (bytes, bytearray)):
+            self._smf = bytes(midifile)
+        elif use_mmap:
+            with midifile.open("rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._smf = memoryview(self._mmap)
+        else:
+            self._smf = midifile.read_bytes()
         self._header, offset = self._header_chunk()
+        self._chunks = self._chunk_index(offset)
 
-        for _ in range(self._header[3]):
-            ckID, ckSize, offset = self._unpack(offset, CKDR)
+        if lazy:
+            return
 
-            current_tick = 0
-            list_event = []
-            while ckSize:
-                ckSize += offset
-                delta_time, offset = self._delta_time(offset)
-                current_tick += delta_time
+        if columnar:
+            self._columnar_tracks()
+            return
 
-                event, offset = self._dequeue_event(offset)
-                list_event.append([current_tick, *event])
-                ckSize -= offset
+        for offset, end in self._chunks:
+            self._tracks += [_decode_list_track(self._smf, offset, end)]
 
-            self._tracks += [list_event]
+    def __enter__(self) -> "StandardMidiFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file of the mmap mode, nothing to do otherwise.
+
+        Decoded events are discarded. Payloads obtained before must have been
+        released, otherwise BufferError is raised.
+        """
+        if self._mmap is not None:
+            self._chunks = list()
+            self._tracks = list()
+            self._tables = list()
+            self._events = np.empty(0, dtype=EVENT_DTYPE)
+            self._smf.release()
+            self._mmap.close()
+            self._mmap = None
+            self._smf = b""
 
     def channels_preset(self) -> list:
         """Get a list of preset numbers for each of the 16 channels.
@@ -64,6 +143,19 @@ class StandardMidiFile:
         :return: list of prest numbers
         """
         channels: list = [[]] * 16
+        if self._columnar:
+            programs = self._events[self._events["status"] == 0xC0]
+            for channel, preset in zip(
+                programs["channel"].tolist(), programs["data1"].tolist()
+            ):
+                channels[channel] = preset
+            return channels
+
+        if self._lazy:
+            for event in self.events(types=(0xC0,)):
+                channels[event.channel] = event.data1
+            return channels
+
         for track in self._tracks:
             for event in track:
                 if event[1] == 0xC:
@@ -75,9 +167,19 @@ class StandardMidiFile:
 
         :return: title
         """
+        if self._columnar:
+            texts = self._meta_texts(self._tables[0], 0x03)
+            return texts[0] if texts else "-"
+
+        if self._lazy:
+            for event in _iter_track(self._smf, 0, *self._chunks[0]):
+                if event.status == 0xFF and event.data1 == 0x03:
+                    return str(event.data, "sjis")
+            return "-"
+
         for event in self._tracks[0]:
             if all([event[1] == 0xFF, event[2] == 0x03]):
-                return event[3].decode("sjis")
+                return str(event[3], "sjis")
         return "-"
 
     def instruments(self) -> list:
@@ -85,11 +187,17 @@ class StandardMidiFile:
 
         :return: instruments
         """
+        if self._columnar:
+            return self._meta_texts(self._events, 0x04)
+
+        if self._lazy:
+            return self._lazy_texts(0x04)
+
         names: list = list()
         for track in self._tracks:
             for event in track:
                 if all([event[1] == 0xFF, event[2] == 0x04]):
-                    names += [event[3].decode("sjis")]
+                    names += [str(event[3], "sjis")]
         return names
 
     def lyrics(self) -> list:
@@ -97,11 +205,17 @@ class StandardMidiFile:
 
         :return: lyrics
         """
+        if self._columnar:
+            return self._meta_texts(self._events, 0x05)
+
+        if self._lazy:
+            return self._lazy_texts(0x05)
+
         texts: list = list()
         for track in self._tracks:
             for event in track:
                 if all([event[1] == 0xFF, event[2] == 0x05]):
-                    texts += [event[3].decode("sjis")]
+                    texts += [str(event[3], "sjis")]
         return texts
 
     def total_tick(self) -> int:
@@ -110,73 +224,142 @@ class StandardMidiFile:
         :return: total ticks
         """
         result: int = 0
+        if self._columnar:
+            for table in self._tables:
+                if len(table):
+                    result = max(result, int(table["tick"][-1]))
+            return result
+
+        if self._lazy:
+            for index, (offset, end) in enumerate(self._chunks):
+                tick = 0
+                for event in _iter_track(self._smf, index, offset, end):
+                    tick = event.tick
+                result = max(result, tick)
+            return result
+
         for track in self._tracks:
             temp = track[len(track) - 1][0]
             result = temp if temp > result else result
         return result
 
-    def _dequeue_as_midi_event(self, event_type: int, offset: int) -> tuple:
-        """
+    def tables(self) -> list:
+        """Get the columnar events of each track.
 
-        :param int event_type:
-        :param int offset:
-        :return:
+        :return: list of numpy.ndarray of :data:`EVENT_DTYPE`, empty if not columnar
         """
-        param = event_type >> 4
-        channel = event_type & 0xF
-        midi_event: list = list()
-        if param in [0x8, 0x9, 0xA, 0xB, 0xE]:
-            value0, value1, offset = self._unpack(offset, ">" "BB")
-            midi_event = [param, channel, value0, value1]
-        elif param in [0xC, 0xD]:
-            value, offset = self._unpack(offset, BYTE)
-            midi_event = [param, channel, value]
-        return (midi_event, offset)
+        return list(self._tables)
 
-    def _dequeue_as_meta_event(self, event_type: int, offset: int) -> tuple:
-        """_de
+    def tempo_map(self) -> "TempoMap":
+        """Get the tempo map built from "Set Tempo" and "Time Signature" events.
 
-        :param int event_type:
-        :param int offset:
-        :return:
+        :return: tempo map
         """
-        meta_type, length, offset = self._unpack(offset, ">" "BB")
-        return (
-            [event_type, meta_type, self._smf[offset : offset + length]],
-            offset + length,
-        )
-
-    def _dequeue_as_sysex_event(self, event_type: int, offset: int) -> tuple:
+        tempos: list = list()
+        time_signatures: list = list()
+        if self._columnar:
+            metas = self._events[self._events["status"] == 0xFF]
+            for tick, meta_type, offset in zip(
+                metas["tick"].tolist(),
+                metas["data1"].tolist(),
+                metas["offset"].tolist(),
+            ):
+                if meta_type == 0x51:
+                    data = self._smf[offset : offset + 3]
+                    tempos += [(tick, int.from_bytes(data, "big"))]
+                elif meta_type == 0x58:
+                    data = self._smf[offset : offset + 2]
+                    time_signatures += [(tick, data[0], data[1])]
+        elif self._lazy:
+            for event in self.events(types=(0xFF,)):
+                if event.data1 == 0x51:
+                    tempos += [(event.tick, int.from_bytes(event.data[:3], "big"))]
+                elif event.data1 == 0x58:
+                    time_signatures += [(event.tick, event.data[0], event.data[1])]
+        else:
+            for track in self._tracks:
+                for event in track:
+                    if all([event[1] == 0xFF, event[2] == 0x51]):
+                        tempos += [(event[0], int.from_bytes(event[3][:3], "big"))]
+                    elif all([event[1] == 0xFF, event[2] == 0x58]):
+                        time_signatures += [(event[0], event[3][0], event[3][1])]
+        return TempoMap(self._header[4], tempos, time_signatures, self.total_tick())
+
+    def events(
+        self,
+        channels: Union[tuple, None] = None,
+        types: Union[tuple, None] = None,
+    ) -> Iterator[tuple]:
+        """Iterate the events of all tracks in time order.
+
+        The tracks are decoded from the file while iterating and merged on a
+        heap, so only one pending event per track is held. Events at the same
+        tick come in track order, then in file order.
+
+        :param tuple channels: MIDI channels to yield, None for all. Meta and
+            sysex events have no channel and are only filtered by "types".
+        :param tuple types: statuses to yield, e.g. (0x90, 0x80, 0xFF), None for all
+        :return: time-ordered events
         """
-
-        :param int event_type:
-        :param int offset:
-        :return:
+        tracks = [
+            _iter_track(self._smf, index, offset, end)
+            for index, (offset, end) in enumerate(self._chunks)
+        ]
+        for event in heapq.merge(*tracks, key=lambda event: event.tick):
+            if types is not None and event.status not in types:
+                continue
+            if channels is not None and event.status < 0xF0:
+                if event.channel not in channels:
+                    continue
+            yield event
+
+    def _chunk_index(self, offset: int) -> list:
+        """Locate the <MTrk event>s of each <Track Chunk>.
+
+        :param int offset: start position of the first track chunk
+        :return: [(start position, end position), ...]
         """
-        length, offset = self._unpack(offset, BYTE)
-        return ([event_type, self._smf[offset : offset + length]], offset + length)
+        chunks: list = list()
+        for _ in range(self._header[3]):
+            ckID, ckSize, offset = self._unpack(offset, CKDR)
+            chunks += [(offset, offset + ckSize)]
+            offset += ckSize
+        return chunks
 
-    def _dequeue_event(self, offset: int) -> tuple:
-        """
+    def _lazy_texts(self, meta_type: int) -> list:
+        """Decode the payloads of the meta events of a type in time order.
 
-        :param int offset:
-        :return:
+        :param int meta_type: meta event type
+        :return: texts
         """
-        event_type: int
-        event_type, offset = self._unpack(offset, BYTE)
-        if self._is_status_byte(event_type):
-            self._last_event_type = event_type
-        else:
-            """running status"""
-            event_type = self._last_event_type
-            offset -= 1
-
-        if event_type == 0xFF:
-            return self._dequeue_as_meta_event(event_type, offset)
-        elif event_type in [0xF0, 0xF7]:
-            return self._dequeue_as_sysex_event(event_type, offset)
-        else:
-            return self._dequeue_as_midi_event(event_type, offset)
+        return [
+            str(event.data, "sjis")
+            for event in self.events(types=(0xFF,))
+            if event.data1 == meta_type
+        ]
+
+    def _columnar_tracks(self) -> None:
+        """<Track Chunk>+ -> one structured array per track."""
+        for offset, end in self._chunks:
+            self._tables += [_decode_track(self._smf, offset, end)]
+
+        if self._tables:
+            self._events = np.concatenate(self._tables)
+
+    def _meta_texts(self, table: np.ndarray, meta_type: int) -> list:
+        """Decode the payloads of the meta events of a type.
+
+        :param numpy.ndarray table: columnar events
+        :param int meta_type: meta event type
+        :return: texts
+        """
+        metas = table[(table["status"] == 0xFF) & (table["data1"] == meta_type)]
+        return [
+            str(self._smf[offset : offset + length], "sjis")
+            for offset, length in zip(
+                metas["offset"].tolist(), metas["length"].tolist()
+            )
+        ]
 
     def _header_chunk(self) -> tuple:
         """<Header Chunk>, <Track Chunk>+ <- <Standard MIDI File>
@@ -186,30 +369,6 @@ class StandardMidiFile:
         ckID, ckSize, format, ntrks, division, offset = self._unpack(0, HEADER_CHUNK)
         return ([ckID.decode(), ckSize, format, ntrks, division], offset)
 
-    def _is_status_byte(self, value: int) -> bool:
-        """Find out if it's a status byte.
-
-        :param int value:
-        :return: True is status byte, False is data byte.
-        """
-        return True if value & 0x80 else False
-
-    def _delta_time(self, offset: int) -> tuple:
-        """<delta-time>, <event>+ <- <MTrk event>
-
-        :param int offset: unpack start position
-        :return: delta-time and new unpack start position
-        """
-        delta_time: int = 0
-        temp: int
-        while True:
-            temp, offset = self._unpack(offset, BYTE)
-            delta_time = temp & 0x7F
-            while self._is_status_byte(temp):
-                temp, offset = self._unpack(offset, BYTE)
-                delta_time = (temp & 0x7F) + (delta_time << 7)
-            return (delta_time, offset)
-
     def _unpack(self, offset: int, format: Union[str, bytes]) -> tuple:
         """Wrap function unpack_from() of 'module struct' module.
 
@@ -223,5 +382,571 @@ class StandardMidiFile:
         )
 
 
+class TempoMap:
+    """TempoMap converts ticks to seconds and bar:beat, and seconds to ticks.
+
+    The tempo and time signature changes are precomputed once, so every
+    conversion is a binary search.
+
+    :param int division: "division" of the header chunk
+    :param list tempos: [(tick, microseconds per quarter-note), ...]
+    :param list time_signatures: [(tick, numerator, power of two of denominator), ...]
+    :param int total_tick: total ticks
+    """
+
+    #: int: tempo when no "Set Tempo" is at tick 0, 120 quarter-notes per minute
+    DEFAULT_TEMPO = 500000
+
+    def __init__(
+        self,
+        division: int,
+        tempos: list,
+        time_signatures: Union[list, None] = None,
+        total_tick: int = 0,
+    ) -> None:
+        if time_signatures is None:
+            time_signatures = list()
+        #: list: the arguments, TempoMap(\*arguments) builds the same tempo map
+        self.arguments: list = [division, tempos, time_signatures, total_tick]
+        #: int: total ticks
+        self.total_tick: int = total_tick
+        self._ticks_per_quarter: int = division
+        self._ticks: list = [0]
+        self._seconds: list = [0.0]
+        self._tempos: list = [self.DEFAULT_TEMPO]
+
+        if division & 0x8000:
+            # SMPTE: -(frames per second), ticks per frame. Tempo has no effect,
+            # one second is counted as a quarter-note.
+            division = (256 - (division >> 8)) * (division & 0xFF)
+            self._ticks_per_quarter = division
+            self._tempos = [1000000]
+            tempos = list()
+            time_signatures = list()
+
+        for tick, tempo in sorted(tempos, key=lambda x: x[0]):
+            if tick != self._ticks[-1]:
+                self._seconds += [self.seconds(tick)]
+                self._ticks += [tick]
+                self._tempos += [tempo]
+            self._tempos[-1] = tempo
+
+        # bar lines where the time signature changes
+        self._bar_ticks: list = [0]
+        self._bar_numbers: list = [0]
+        self._bar_lengths: list = [(division * 4, division)]  # ticks per bar, beat
+        for tick, numerator, powers in sorted(time_signatures, key=lambda x: x[0]):
+            bar, beat, ticks = self.bar_beat(tick)
+            if beat or ticks:
+                bar += 1  # takes effect at the next bar line
+            tick = self.bar_start(bar)
+            beat_length = division * 4 // (2**powers)
+            if tick != self._bar_ticks[-1]:
+                self._bar_ticks += [tick]
+                self._bar_numbers += [bar]
+                self._bar_lengths += [None]
+            self._bar_lengths[-1] = (numerator * beat_length, beat_length)
+
+    def seconds(self, tick: int) -> float:
+        """Convert ticks to seconds.
+
+        :param int tick: ticks
+        :return: seconds
+        """
+        i = bisect_right(self._ticks, tick) - 1
+        quarters = (tick - self._ticks[i]) / self._ticks_per_quarter
+        return self._seconds[i] + quarters * self._tempos[i] / 1000000
+
+    def tick(self, seconds: float) -> int:
+        """Convert seconds to ticks.
+
+        :param float seconds: seconds
+        :return: ticks
+        """
+        i = bisect_right(self._seconds, seconds) - 1
+        quarters = (seconds - self._seconds[i]) * 1000000 / self._tempos[i]
+        return self._ticks[i] + int(quarters * self._ticks_per_quarter)
+
+    @property
+    def total_seconds(self) -> float:
+        """float: duration in seconds"""
+        return self.seconds(self.total_tick)
+
+    def bar_start(self, bar: int) -> int:
+        """Get the tick where a bar starts.
+
+        :param int bar: bar number, the first bar is 0
+        :return: ticks
+        """
+        i = bisect_right(self._bar_numbers, bar) - 1
+        bar_length, _ = self._bar_lengths[i]
+        return self._bar_ticks[i] + (bar - self._bar_numbers[i]) * bar_length
+
+    def bar_beat(self, tick: int) -> tuple:
+        """Convert ticks to bar and beat.
+
+        :param int tick: ticks
+        :return: bar, beat in the bar and tick in the beat, all counted from 0
+        """
+        i = bisect_right(self._bar_ticks, tick) - 1
+        bar_length, beat_length = self._bar_lengths[i]
+        bars, ticks = divmod(tick - self._bar_ticks[i], bar_length)
+        beat, ticks = divmod(ticks, beat_length)
+        return (self._bar_numbers[i] + bars, beat, ticks)
+
+
+class SmfStreamParser:
+    """SmfStreamParser decodes SMF(Standard MIDI File) data fed in pieces.
+
+    Only the bytes of one incomplete event are kept between :meth:`feed`
+    calls, with the running status, the tick and the position in the chunk,
+    so a file can be read chunk by chunk from disk or a pipe. Events come in
+    file order, i.e. track by track. Chunks other than "MThd" and "MTrk" are
+    skipped. See :func:`stream_events` for reading a file.
+    """
+
+    def __init__(self) -> None:
+        #: list: chunk type, length, format, ntrks, division, empty until read
+        self.header: list = list()
+        #: int: number of the current track, -1 before the first track
+        self.track: int = -1
+        self._buffer: bytearray = bytearray()
+        self._position: int = 0
+        self._remaining: int = 0  # bytes left in the current track chunk
+        self._skip: int = 0  # bytes left to skip
+        self._tick: int = 0
+        self._running: int = 0
+
+    def feed(self, data: bytes) -> None:
+        """Append the next piece of the file.
+
+        :param bytes data: next bytes of the file
+        """
+        del self._buffer[: self._position]
+        self._position = 0
+        self._buffer += data
+
+    def events(self) -> Iterator[tuple]:
+        """Decode the complete events fed so far.
+
+        :return: :data:`SmfEvent` with the track number
+        """
+        while True:
+            if self._skip:
+                skipped = min(self._skip, len(self._buffer) - self._position)
+                self._position += skipped
+                self._skip -= skipped
+                if self._skip:
+                    return
+            elif self._remaining:
+                try:
+                    event, position = self._event(self._position)
+                except IndexError:
+                    return  # wait for the rest of the event
+                self._remaining -= position - self._position
+                self._position = position
+                if event.status == 0xFF and event.data1 == 0x2F:
+                    self._skip, self._remaining = self._remaining, 0
+                yield event
+            elif not self._chunk():
+                return
+
+    def _chunk(self) -> bool:
+        """Read a chunk header, and the header chunk data.
+
+        :return: False if more data is needed
+        """
+        offset = self._position
+        if len(self._buffer) < offset + struct.calcsize(CKDR):
+            return False
+        ckID, ckSize = struct.unpack_from(CKDR, self._buffer, offset)
+        offset += struct.calcsize(CKDR)
+        if ckID == b"MThd":
+            if len(self._buffer) < offset + ckSize:
+                return False
+            format, ntrks, division = struct.unpack_from(
+                ">" "HHH", self._buffer, offset
+            )
+            self.header = [ckID.decode(), ckSize, format, ntrks, division]
+            offset += ckSize
+        elif ckID == b"MTrk":
+            self.track += 1
+            self._remaining = ckSize
+            self._tick = 0
+            self._running = 0
+        else:
+            self._skip = ckSize
+        self._position = offset
+        return True
+
+    def _event(self, offset: int) -> tuple:
+        """<MTrk event>, raises IndexError if not fed completely.
+
+        :param int offset: start position of the event in the buffer
+        :return: event and the position after it
+        """
+        smf = self._buffer
+        decoder = _EventDecoder(smf, offset, self._running)
+        try:
+            decoder.decode()
+        except ValueError:
+            track = self.track
+            raise ValueError(f"data byte without status in track {track}") from None
+        start, end = decoder.start, decoder.offset
+        if len(smf) < end:
+            raise IndexError("incomplete payload")
+        data = bytes(smf[start:end]) if decoder.status >= 0xF0 else b""
+
+        # the event is complete, commit the state
+        self._running = decoder.running
+        self._tick += decoder.delta_time
+        event = SmfEvent(
+            self._tick,
+            self.track,
+            decoder.status,
+            decoder.channel,
+            decoder.data1,
+            decoder.data2,
+            data,
+        )
+        return (event, end)
+
+
+def stream_events(midifile: Path, chunk_size: int = 65536) -> Iterator[tuple]:
+    """Decode a SMF(Standard MIDI File) reading chunk_size bytes at a time.
+
+    :param pathlib.Path midifile: target SMF(Standard MIDI File)
+    :param int chunk_size: bytes read at a time
+    :return: :data:`SmfEvent` in file order
+    """
+    parser = SmfStreamParser()
+    with midifile.open("rb") as f:
+        for data in iter(lambda: f.read(chunk_size), b""):
+            parser.feed(data)
+            yield from parser.events()
+
+
+class _EventDecoder:
+    """Decoder of <MTrk event>s, the decoder of every mode of this module.
+
+    :meth:`decode` reads the event at :attr:`offset` into the attributes:
+
+    - status: 0x80..0xE0 for MIDI events (channel removed), 0xFF, 0xF0 or 0xF7
+    - data1: meta type for meta events, 0 for sysex events
+    - start, length: payload of meta and sysex events, not read by the decoder
+
+    :param bytes data: SMF(Standard MIDI File) data, or a buffer of a piece of it
+    :param int offset: start position of the first event
+    :param int running: running status, 0 if none yet
+    """
+
+    def __init__(self, data, offset: int, running: int = 0) -> None:
+        self.data = data
+        #: int: position of the next event
+        self.offset: int = offset
+        #: int: running status
+        self.running: int = running
+        self.delta_time: int = 0
+        self.status: int = 0
+        self.channel: int = 0
+        self.data1: int = 0
+        self.data2: int = 0
+        self.start: int = 0
+        self.length: int = 0
+
+    def decode(self) -> int:
+        """Decode the next event.
+
+        Raises IndexError if the data ends inside the event, and then the
+        position and the running status are left as they were.
+
+        :return: status of the event
+        """
+        offset = self.offset
+        value = self.data[offset]
+        offset += 1
+        delta_time = value & 0x7F
+        while value & 0x80:
+            value = self.data[offset]
+            offset += 1
+            delta_time = (delta_time << 7) | (value & 0x7F)
+
+        value = self.data[offset]
+        if value == 0xFF or value == 0xF0 or value == 0xF7:
+            meta_type = self.data[offset + 1] if value == 0xFF else 0
+            offset += 2 if value == 0xFF else 1
+            status = value
+            length = 0
+            while True:
+                value = self.data[offset]
+                offset += 1
+                length = (length << 7) | (value & 0x7F)
+                if not value & 0x80:
+                    break
+            self.delta_time = delta_time
+            self.status = status
+            self.channel = 0
+            self.data1 = meta_type
+            self.data2 = 0
+            self.start = offset
+            self.length = length
+            self.offset = offset + length
+            return status
+
+        running = self.running
+        if value & 0x80:
+            running = value
+            offset += 1
+        elif not running:
+            raise ValueError(f"data byte without status at {offset}")
+        status = running & 0xF0
+        data1 = self.data[offset]
+        if status == 0xC0 or status == 0xD0:
+            data2 = 0
+            offset += 1
+        else:
+            data2 = self.data[offset + 1]
+            offset += 2
+        self.delta_time = delta_time
+        self.status = status
+        self.channel = running & 0x0F
+        self.data1 = data1
+        self.data2 = data2
+        self.start = 0
+        self.length = 0
+        self.running = running
+        self.offset = offset
+        return status
+
+
+def _decode_list_track(smf: Union[bytes, memoryview], offset: int, end: int) -> list:
+    """Decode the events of one <Track Chunk> into the lists of events.
+
+    - MIDI event: [tick, status >> 4, channel, data1(, data2)]
+    - meta event: [tick, 0xFF, meta type, payload]
+    - sysex event: [tick, 0xF0 or 0xF7, payload]
+
+    :param bytes smf: SMF(Standard MIDI File) data, or a memoryview of it
+    :param int offset: start position of the <MTrk event>s
+    :param int end: end position of the track chunk
+    :return: list of events
+    """
+    decoder = _EventDecoder(smf, offset)
+    events: list = list()
+    tick: int = 0
+
+    while decoder.offset < end:
+        status = decoder.decode()
+        tick += decoder.delta_time
+        if status == 0xFF:
+            payload = smf[decoder.start : decoder.start + decoder.length]
+            events.append([tick, status, decoder.data1, payload])
+            if decoder.data1 == 0x2F:
+                break
+        elif status == 0xF0 or status == 0xF7:
+            payload = smf[decoder.start : decoder.start + decoder.length]
+            events.append([tick, status, payload])
+        elif status == 0xC0 or status == 0xD0:
+            events.append([tick, status >> 4, decoder.channel, decoder.data1])
+        else:
+            events.append(
+                [tick, status >> 4, decoder.channel, decoder.data1, decoder.data2]
+            )
+
+    return events
+
+
+def _decode_track(smf: Union[bytes, memoryview], offset: int, end: int) -> np.ndarray:
+    """Decode the events of one <Track Chunk> into a structured array.
+
+    The events are counted first, then the fields of the preallocated array
+    are filled one event at a time, through typed memoryviews when compiled.
+
+    :param bytes smf: SMF(Standard MIDI File) data, or a memoryview of it
+    :param int offset: start position of the <MTrk event>s
+    :param int end: end position of the track chunk
+    :return: numpy.ndarray of :data:`EVENT_DTYPE`
+    """
+    decoder = _EventDecoder(smf, offset)
+    count: int = 0
+    while decoder.offset < end:
+        status = decoder.decode()
+        count += 1
+        if status == 0xFF and decoder.data1 == 0x2F:
+            break
+
+    table = np.empty(count, dtype=EVENT_DTYPE)
+    ticks = table["tick"]
+    statuses = table["status"]
+    channels = table["channel"]
+    data1s = table["data1"]
+    data2s = table["data2"]
+    offsets = table["offset"]
+    lengths = table["length"]
+    decoder = _EventDecoder(smf, offset)
+    tick: int = 0
+
+    for index in range(count):
+        statuses[index] = decoder.decode()
+        tick += decoder.delta_time
+        ticks[index] = tick
+        channels[index] = decoder.channel
+        data1s[index] = decoder.data1
+        data2s[index] = decoder.data2
+        offsets[index] = decoder.start
+        lengths[index] = decoder.length
+
+    return table
+
+
+def _iter_track(
+    smf: Union[bytes, memoryview], track: int, offset: int, end: int
+) -> Iterator[tuple]:
+    """Decode the events of one <Track Chunk> one at a time.
+
+    :param bytes smf: SMF(Standard MIDI File) data, or a memoryview of it
+    :param int track: track number given to the events
+    :param int offset: start position of the <MTrk event>s
+    :param int end: end position of the track chunk
+    :return: events of the track, up to "End of Track"
+    """
+    decoder = _EventDecoder(smf, offset)
+    tick: int = 0
+
+    while decoder.offset < end:
+        status = decoder.decode()
+        tick += decoder.delta_time
+        data1 = decoder.data1
+        if status >= 0xF0:
+            payload = smf[decoder.start : decoder.start + decoder.length]
+            yield SmfEvent(tick, track, status, 0, data1, 0, payload)
+            if data1 == 0x2F and status == 0xFF:
+                return
+        else:
+            channel, data2 = decoder.channel, decoder.data2
+            yield SmfEvent(tick, track, status, channel, data1, data2, b"")
+
+
+#: tuple: default items of :func:`scan_metadata`
+METADATA_ITEMS = ("title", "total_tick", "channels_preset")
+
+
+def scan_metadata(midifile: Path, items: tuple = METADATA_ITEMS) -> dict:
+    """Scan only the header and meta events of a SMF(Standard MIDI File).
+
+    MIDI events are skipped by their known lengths and only program changes
+    are read. A track is left as soon as nothing requested can follow in it,
+    i.e. at "End of Track", or once the title is found when only "title" is
+    requested.
+
+    :param pathlib.Path midifile: target SMF(Standard MIDI File)
+    :param tuple items: items to scan, "title", "total_tick", "channels_preset",
+        "instruments", "lyrics_count" and "tempo_map"
+    :return: keywords of the requested items
+    """
+    smf: bytes = midifile.read_bytes()
+    ckID, ckSize, format, ntrks, division = struct.unpack_from(HEADER_CHUNK, smf, 0)
+    offset: int = struct.calcsize(CKDR) + ckSize
+
+    walk: bool = any(item != "title" for item in items)
+    channels: list = [[]] * 16
+    titles: list = list()
+    metas: dict = dict()
+    if "instruments" in items:
+        metas[0x04] = list()
+    if "lyrics_count" in items:
+        metas[0x05] = list()
+    if "tempo_map" in items:
+        metas[0x51] = list()
+        metas[0x58] = list()
+    total_tick: int = 0
+
+    for index in range(ntrks):
+        ckID, ckSize = struct.unpack_from(CKDR, smf, offset)
+        offset += struct.calcsize(CKDR)
+        if index == 0 and "title" in items:
+            tick = _scan_track(
+                smf,
+                offset,
+                offset + ckSize,
+                {**metas, 0x03: titles},
+                channels if "channels_preset" in items else None,
+                walk,
+            )
+            total_tick = max(total_tick, tick)
+        elif walk:
+            tick = _scan_track(
+                smf,
+                offset,
+                offset + ckSize,
+                metas,
+                channels if "channels_preset" in items else None,
+                walk,
+            )
+            total_tick = max(total_tick, tick)
+        offset += ckSize
+
+    result: dict = dict()
+    if "title" in items:
+        result["title"] = titles[0][1].decode("sjis") if titles else "-"
+    if "total_tick" in items:
+        result["total_tick"] = total_tick
+    if "channels_preset" in items:
+        result["channels_preset"] = channels
+    if "instruments" in items:
+        result["instruments"] = [name.decode("sjis") for _, name in metas[0x04]]
+    if "lyrics_count" in items:
+        result["lyrics_count"] = len(metas[0x05])
+    if "tempo_map" in items:
+        result["tempo_map"] = TempoMap(
+            division,
+            [(tick, int.from_bytes(data[:3], "big")) for tick, data in metas[0x51]],
+            [(tick, data[0], data[1]) for tick, data in metas[0x58]],
+            total_tick,
+        )
+    return result
+
+
+def _scan_track(
+    smf: bytes,
+    offset: int,
+    end: int,
+    metas: dict,
+    channels: Union[list, None],
+    walk: bool,
+) -> int:
+    """Walk one <Track Chunk> reading only what :func:`scan_metadata` needs.
+
+    :param bytes smf: SMF(Standard MIDI File) data
+    :param int offset: start position of the <MTrk event>s
+    :param int end: end position of the track chunk
+    :param dict metas: {meta type: list}, (tick, payload) are appended to the list,
+        only the first "Sequence/Track Name" is kept
+    :param list channels: program numbers are stored per channel, or None
+    :param bool walk: walk to the end of the track even after the title
+    :return: tick of the last event walked
+    """
+    decoder = _EventDecoder(smf, offset)
+    tick: int = 0
+
+    while decoder.offset < end:
+        status = decoder.decode()
+        tick += decoder.delta_time
+        data1 = decoder.data1
+        if status == 0xFF:
+            if data1 == 0x2F:
+                break
+            if data1 in metas:
+                if data1 != 0x03 or not metas[0x03]:
+                    payload = smf[decoder.start : decoder.start + decoder.length]
+                    metas[data1].append((tick, payload))
+                if data1 == 0x03 and not walk:
+                    break
+        elif status == 0xC0 and channels is not None:
+            channels[decoder.channel] = data1
+
+    return tick
+
+
 if __name__ == "__main__":
     print(__file__)
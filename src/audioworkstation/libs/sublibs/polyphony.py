@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Polyphony and event density of a SMF(Standard MIDI File).
+
+The profile of a song sizes the synthesizer for it: "synth.polyphony" and
+"synth.cpu-cores" are derived from the peak number of sounding notes, instead
+of one static setting for every song. The presets playing notes are listed,
+so only their samples need to be loaded.
+"""
+
+from dataclasses import dataclass, field
+from math import ceil
+from os import cpu_count
+from pathlib import Path
+from typing import Iterable, Union
+
+from . import paramsmid as PMID
+
+#: int: voices per sounding note, most SoundFont presets layer two samples
+VOICES_PER_NOTE = 2
+#: float: margin for voices still in their release phase after note off
+RELEASE_MARGIN = 1.5
+#: int: voices one core renders comfortably on a Raspberry Pi 4
+VOICES_PER_CORE = 64
+#: int: lower limit of "synth.polyphony"
+MIN_POLYPHONY = 32
+#: int: upper limit of "synth.polyphony", the default of FluidSynth
+MAX_POLYPHONY = 256
+
+# order of the events at the same tick, note off first so they do not overlap
+_ORDER = {0x80: 0, 0xB0: 1, 0xC0: 1, 0x90: 2}
+#: int: bank of the presets on the drum channel 9
+DRUM_BANK = 128
+
+
+@dataclass
+class PolyphonyProfile:
+    """Peak simultaneous notes per channel and of the whole song."""
+
+    #: list: peak notes held by keys, per channel
+    channel_peak_notes: list = field(default_factory=lambda: [0] * 16)
+    #: list: peak notes sounding, held by keys or by the sustain pedal, per channel
+    channel_peak_sounding: list = field(default_factory=lambda: [0] * 16)
+    #: list: peak notes sounding only because of the sustain pedal, per channel
+    channel_peak_sustained: list = field(default_factory=lambda: [0] * 16)
+    #: int: peak notes held by keys, all channels
+    peak_notes: int = 0
+    #: int: peak notes sounding, all channels
+    peak_sounding: int = 0
+    #: list: number of note on per second, index is the second
+    notes_per_second: list = field(default_factory=list)
+    #: list: (bank, program) of the presets playing notes, in order of first use
+    presets: list = field(default_factory=list)
+
+    def synth_settings(self, cores: Union[int, None] = None) -> dict:
+        """FluidSynth settings sized for the song.
+
+        "synth.polyphony" can be set on a running synthesizer, "synth.cpu-cores"
+        only applies to a new one, e.g. the renderer of :mod:`player.render`.
+
+        :param int cores: available cores, None for all but one of this machine
+        :return: {"synth.polyphony": int, "synth.cpu-cores": int}
+        """
+        if cores is None:
+            cores = max(1, (cpu_count() or 1) - 1)
+        voices = ceil(self.peak_sounding * VOICES_PER_NOTE * RELEASE_MARGIN)
+        polyphony = min(MAX_POLYPHONY, max(MIN_POLYPHONY, ceil(voices / 16) * 16))
+        return {
+            "synth.polyphony": polyphony,
+            "synth.cpu-cores": max(1, min(cores, ceil(polyphony / VOICES_PER_CORE))),
+        }
+
+
+def analyze(events: Iterable, tempo_map: PMID.TempoMap) -> PolyphonyProfile:
+    """Profile time-ordered events.
+
+    :param Iterable events: :data:`paramsmid.SmfEvent` in time order
+    :param TempoMap tempo_map: tempo map of the song
+    :return: profile
+    """
+    result = PolyphonyProfile()
+    held: list = [set() for _ in range(16)]
+    sustained: list = [set() for _ in range(16)]  # released while the pedal is on
+    pedal: list = [False] * 16
+    notes: list = [0] * 16
+    sounding: list = [0] * 16
+    histogram: list = result.notes_per_second
+    banks: list = [DRUM_BANK if channel == 9 else 0 for channel in range(16)]
+    programs: list = [0] * 16
+    presets: set = set()
+
+    for tick, group in _by_tick(events):
+        channels: set = set()
+        for event in sorted(group, key=lambda event: _ORDER.get(event.status, 1)):
+            channel, key = event.channel, event.data1
+            if event.status == 0x90 and event.data2:
+                held[channel].add(key)
+                sustained[channel].discard(key)
+                second = int(tempo_map.seconds(tick))
+                if len(histogram) <= second:
+                    histogram += [0] * (second + 1 - len(histogram))
+                histogram[second] += 1
+                preset = (banks[channel], programs[channel])
+                if preset not in presets:
+                    presets.add(preset)
+                    result.presets.append(preset)
+            elif event.status in (0x80, 0x90):
+                if key in held[channel]:
+                    held[channel].discard(key)
+                    if pedal[channel]:
+                        sustained[channel].add(key)
+            elif event.status == 0xB0 and key == 0x40:  # Sustain Pedal
+                pedal[channel] = event.data2 >= 64
+                if not pedal[channel]:
+                    sustained[channel].clear()
+            elif event.status == 0xB0 and key == 0x00 and channel != 9:  # Bank MSB
+                banks[channel] = event.data2
+                continue
+            elif event.status == 0xC0:
+                programs[channel] = key
+                continue
+            else:
+                continue
+            channels.add(channel)
+
+        for channel in channels:
+            notes[channel] = len(held[channel])
+            sounding[channel] = notes[channel] + len(sustained[channel])
+            result.channel_peak_notes[channel] = max(
+                result.channel_peak_notes[channel], notes[channel]
+            )
+            result.channel_peak_sounding[channel] = max(
+                result.channel_peak_sounding[channel], sounding[channel]
+            )
+            result.channel_peak_sustained[channel] = max(
+                result.channel_peak_sustained[channel], len(sustained[channel])
+            )
+        result.peak_notes = max(result.peak_notes, sum(notes))
+        result.peak_sounding = max(result.peak_sounding, sum(sounding))
+    return result
+
+
+def profile(midifile: Union[Path, bytes]) -> PolyphonyProfile:
+    """Profile a MIDI file.
+
+    :param Path midifile: target MIDI file, or its data
+    :return: profile
+    """
+    smf = PMID.StandardMidiFile(midifile, lazy=True)
+    return analyze(smf.events(types=tuple(_ORDER)), smf.tempo_map())
+
+
+def _by_tick(events: Iterable) -> Iterable:
+    """Group time-ordered events by tick.
+
+    :param Iterable events: :data:`paramsmid.SmfEvent` in time order
+    :return: (tick, [events]), ...
+    """
+    group: list = list()
+    for event in events:
+        if group and event.tick != group[0].tick:
+            yield (group[0].tick, group)
+            group = list()
+        group.append(event)
+    if group:
+        yield (group[0].tick, group)
@@ -39,19 +39,14 @@ def bar_pattern() -> bool:
     vel = [127, 95, 64]
     dur = int(sfs._quaternote * 4 / int(notevalue))
 
+    notes: list = list()
     for i in range(len(rhythm)):
         for j in range(rhythm[i]):
             k = 0 if all([i == 0, j == 0]) else 1
             m = 0 if all([i == 0, j == 0]) else 1 if j == 0 else 2
-            sfs.note_at(
-                time_marker,
-                9,
-                key[k],
-                vel[m],
-                int(dur / 2),
-                destination=sfs.clients[0],
-            )
+            notes += [(time_marker, 9, key[k], vel[m], int(dur / 2))]
             time_marker += dur
+    sfs.notes_at(notes, destination=sfs.clients[0])
     sfs.timer_at(time_marker, destination=sfs.clients[1])
     return True
 
@@ -63,9 +58,11 @@ class Metronome:
         global sfs, schedule_stop, rhythm, notevalue
 
         with open("config/screen.json", "rt") as f:
-            kwargs = load(f)["metronome"]
+            screen = load(f)
 
-        sfs = PtFS.Sequencer(**kwargs)
+        engine = PtFS.engine(**screen["engine"])
+        sfs = PtFS.Sequencer(**screen["metronome"], engine=engine)
+        sfs.drum_channel(9)  # may be melodic outside partition 0
         sfs.register_client("bar", bar_callback)
 
     @property
@@ -4,14 +4,20 @@
 
 from pathlib import Path
 from json import dump, load
+from typing import Union
 
+from ..libs.sublibs import paramsf2 as PSF2
 from ..libs.sublibs import paramsmid as PMID
+from ..libs.sublibs import polyphony as PP
 from ..libs.audio import fluidsynth as FS
 from ..libs.sublibs.parts import dB2gain, gain2dB
 
 
 with open("config/screen.json", "rt") as f:
-    kwargs = load(f)["player"]
+    screen = load(f)
+    kwargs = screen["player"]
+    #: dict: kwargs of the synthesizer shared with "keyboard" and "metronome"
+    engine_kwargs = screen["engine"]
 
 
 class MidiPlayer:
@@ -22,26 +28,79 @@ class MidiPlayer:
     #: float: gain
     gain: float = 0.2
 
-    def start(self, filename: str) -> str:
+    def __init__(self) -> None:
+        #: dict: profile of each midi file
+        self.profiles: dict = dict()
+        #: str: midi file whose presets are preloaded
+        self.preloaded: str = ""
+        #: str: midi file queued in the player, "" if none or played to the end
+        self.loaded: str = ""
+        #: bool: playback stopped before the end
+        self.stopped: bool = False
+
+    def start(self, filename: str, buffer: Union[bytes, None] = None) -> str:
         """Starts playback of the specified midi file.
 
-        :param str filename: midi filename
+        The polyphony of the shared synthesizer, see :func:`FS.engine`, is set
+        to the size of the file, and the samples of the presets of the file are
+        loaded before playback, see :func:`polyphony.profile`.
+
+        The player is kept between playbacks, a resumed file is only seeked.
+
+        :param str filename: midi filename, or a name of the buffer
+        :param bytes buffer: SMF data to play instead of the file,
+            e.g. :func:`csv2mid.generate_bytes`
         :return: filename
         """
-        kwargs["standardmidifile"] = [filename]
-        self.fsmp = FS.MidiPlayer(**kwargs)
+        if buffer is not None:
+            sources = {"standardmidifile": [], "standardmidibuffer": [buffer]}
+            profile = PP.profile(buffer)
+        else:
+            if filename not in self.profiles:
+                self.profiles[filename] = PP.profile(Path(filename))
+            sources = {"standardmidifile": [filename], "standardmidibuffer": []}
+            profile = self.profiles[filename]
+        kwargs.update(sources)
+        engine = FS.engine(**engine_kwargs)
+        # "synth.cpu-cores" is fixed once the engine is made
+        engine.polyphony = profile.synth_settings()["synth.polyphony"]
+        if not hasattr(self, "fsmp"):
+            self.fsmp = FS.MidiPlayer(**kwargs, engine=engine)
+            self.fsmp.gain = self.gain
+        elif buffer is not None or filename != self.loaded:
+            self.fsmp.load(**sources)
+        self.loaded = "" if buffer is not None else filename
+        # after the load, which resets the partition of the player
+        if "preload" in kwargs and (buffer is not None or filename != self.preloaded):
+            if not hasattr(self, "preloader"):
+                self.preloader = FS.Synthesizer(
+                    engine=engine, partition=kwargs["preload"]
+                )
+            self.preloader.preload(profile.presets)
+            self.preloaded = "" if buffer is not None else filename
         self.fsmp.apply_rules("config/rule.mute_chan.json")
-        self.fsmp.gain = self.gain
+        self.stopped = False
         self.fsmp.playback(self.pause_tick)
+        if not self.stopped:
+            self.loaded = ""  # played to the end, the player is used up
         return f"{filename}"
 
     def stop(self) -> None:
         """Stops the playback of Midi files."""
 
         if hasattr(self, "fsmp"):
+            self.stopped = True
             self.pause_tick = self.fsmp.stop()
             self.gain = self.fsmp.gain
+
+    def close(self) -> None:
+        """Stops the playback and releases the player."""
+        self.stop()
+        if hasattr(self, "fsmp"):
             del self.fsmp
+        if hasattr(self, "preloader"):
+            del self.preloader
+        self.loaded = self.preloaded = ""
 
     @property
     def tick(self) -> int:
@@ -68,14 +127,9 @@ def info_midifile(midifile: Path) -> dict:
     """Returns information about the Midi file.
 
     :param Path midifile: Target Midi file
-    :return: keywords: "title", "total_ticks", "channel_presets"
+    :return: keywords: "title", "total_tick", "channels_preset"
     """
-    _smf = PMID.StandardMidiFile(midifile)
-    items: dict = {}
-    items["title"] = _smf.title()
-    items["total_tick"] = _smf.total_tick()
-    items["channels_preset"] = _smf.channels_preset()
-    return items
+    return PMID.scan_metadata(midifile)
 
 
 def gm_sound_set_names() -> tuple:
@@ -83,16 +137,22 @@ def gm_sound_set_names() -> tuple:
 
     :return: list of GM Sound Set names
     :return: list of GM Percussion Sound Set names
-    """
 
-    synth = FS.Synthesizer(**kwargs)
+    The names are read from the soundfont files, see :class:`PSF2.PresetIndex`.
+    """
+    if "soundfont" in engine_kwargs:
+        soundfonts = engine_kwargs["soundfont"]
+    else:  # the soundfont of the settings
+        soundfonts = FS.engine(**engine_kwargs).soundfonts
 
     gm_sound_sets: list = list()
     gm_percussion_sound_sets: list = list()
     snames: list = list()
     pnames: list = list()
 
-    gm_sound_sets, gm_percussion_sound_sets = synth.gm_sound_set()
+    gm_sound_sets, gm_percussion_sound_sets = PSF2.PresetIndex().gm_sound_set(
+        soundfonts
+    )
     for i in range(128):
         snames += [gm_sound_sets[i]["name"]]
         pnames += [gm_percussion_sound_sets[i]["name"]]
@@ -107,10 +167,25 @@ def mute_rules(**mute_flags) -> str:
     {'0':True, '1':False, ..., '15':False}: True is mute, False is unmute
     """
 
-    rules: dict = dict()
     #: str: filename
     filename = "config/rule.mute_chan.json"
 
+    with open(filename, "w") as fw:
+        dump(mute_rule_set(**mute_flags), fw, indent=4)
+
+    return filename
+
+
+def mute_rule_set(**mute_flags) -> dict:
+    """Rules specifying channels to mute, for :meth:`FS.MidiRouter.apply_rules`
+
+    :param dict(str, bool) mute_flags:
+    {'0':True, '1':False, ..., '15':False}: True is mute, False is unmute
+    :return: rules
+    """
+
+    rules: dict = dict()
+
     # Note
     for chan in list(mute_flags):
         if mute_flags[chan]:
@@ -181,10 +256,7 @@ def mute_rules(**mute_flags) -> str:
         "param2": None,
     }
 
-    with open(filename, "w") as fw:
-        dump(rules, fw, indent=4)
-
-    return filename
+    return rules
 
 
 if __name__ == "__main__":
@@ -22,6 +22,7 @@ from kivy.event import EventDispatcher
 from kivy.lang import Builder
 
 from . import midifile as MF
+from ..libs.sublibs import midilibrary as ML
 
 Builder.load_file(str(Path(__file__).with_name("player.kv")))
 
@@ -48,6 +49,8 @@ class MidiTitleButton(ToggleButton, EventDispatcher):
     total_tick = NumericProperty()
     #: ListProperty: channel preset
     channels_preset = ListProperty()
+    #: ObjectProperty: tempo map, PMID.TempoMap
+    tempo_map = ObjectProperty(None)
 
     def __str__(self) -> str:
         result = f"title: {self.text}" + ", "
@@ -73,6 +76,8 @@ class PlayerView(Screen):
     sound_set: list = list()
     percussion_sound_set: list = list()
     executor = futures.ThreadPoolExecutor()
+    #: PMID.TempoMap: tempo map of the selected SMF
+    tempo_map = MF.PMID.TempoMap(480, [])
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -82,16 +87,32 @@ class PlayerView(Screen):
         self.sound_set, self.percussion_sound_set = MF.gm_sound_set_names()
         self.add_channelbuttons()
 
+        self.library = ML.MidiLibrary()
+        #: bool: the library is closed, scanned files are dropped
+        self.closed: bool = False
+        #: list: scheduled callbacks of scanned files
+        self.scanned_events: list = list()
+        self.scanner = ML.LibraryScanner(self.scanned)
         extension = [".mid", ".MID"]
         mids = [i for i in Path().glob("mid/*.*") if i.suffix in extension]
+        self.library.prune(mids)
         for mid in mids:
-            Clock.schedule_once(partial(self.add_midititlebutton, mid))
+            smf = self.library.lookup(mid)
+            if smf is None:
+                self.scanner.submit(mid)
+            else:
+                Clock.schedule_once(partial(self.add_midititlebutton, mid, smf))
 
         self.midi_player = MF.MidiPlayer()
 
     def unregister(self) -> None:
         """Processing when terminating a View."""
-        self.midi_player.stop()
+        self.closed = True
+        self.scanner.cancel()
+        for event in self.scanned_events:
+            event.cancel()
+        self.midi_player.close()
+        self.library.close()
 
     def playback(self, state: str) -> None:
         """playback _summary_
@@ -193,6 +214,20 @@ class PlayerView(Screen):
         """
         self.ticks_slider.value = self.midi_player.tick
 
+    def position(self, tick: float, total_tick: float) -> str:
+        """Text of the playback position, in time and bar:beat.
+
+        :param float tick: current tick
+        :param float total_tick: total ticks
+        :return: "mm:ss bar:beat" and "Max: mm:ss"
+        """
+        minutes, seconds = divmod(int(self.tempo_map.seconds(int(tick))), 60)
+        bar, beat, _ = self.tempo_map.bar_beat(int(tick))
+        result = f"{minutes:02}:{seconds:02} {bar + 1}:{beat + 1}" + "\n"
+        minutes, seconds = divmod(int(self.tempo_map.seconds(int(total_tick))), 60)
+        result += f"Max: {minutes:02}:{seconds:02}"
+        return result
+
     def select(self, mtb: MidiTitleButton):
         """Select the SMF corresponding to the MidiTitleButton
 
@@ -200,6 +235,7 @@ class PlayerView(Screen):
         """
         self.status(PLAYER_STATUS.STANDBY)
         Logger.debug("player: " + str(mtb))
+        self.tempo_map = mtb.tempo_map
         self.ticks_slider.max = mtb.total_tick
 
         for cb in self.channels.children:
@@ -229,18 +265,52 @@ class PlayerView(Screen):
             channels[str(cb.index)] = False if cb.state == "down" else True
         return MF.mute_rules(**channels)
 
-    def add_midititlebutton(self, midifile: Path, dt: int) -> None:
+    def scanned(self, midifile: Path, stat, smf, error) -> None:
+        """Receive a scanned MIDI file from the scanner's thread.
+
+        :param Path midifile: scanned MIDI file
+        :param os.stat_result stat: status of the file when it was scanned
+        :param dict smf: information about the MIDI file, None on error
+        :param BaseException error: reason why the file could not be scanned
+        """
+        if self.closed:
+            return
+        self.scanned_events += [
+            Clock.schedule_once(
+                partial(self.index_midititlebutton, midifile, stat, smf, error)
+            )
+        ]
+
+    def index_midititlebutton(self, midifile: Path, stat, smf, error, dt: int) -> None:
+        """Store a scanned MIDI file in the library and add its button.
+
+        :param Path midifile: scanned MIDI file
+        :param os.stat_result stat: status of the file when it was scanned
+        :param dict smf: information about the MIDI file, None on error
+        :param BaseException error: reason why the file could not be scanned
+        :param int dt: interval time
+        """
+        if self.closed:  # scheduled before unregister()
+            return
+        if error is not None:
+            Logger.warning(f"player: Skip {midifile} - {error!r}")
+            return
+        self.library.store(midifile, smf, stat)
+        self.add_midititlebutton(midifile, smf, dt)
+
+    def add_midititlebutton(self, midifile: Path, smf: dict, dt: int) -> None:
         """add_midititlebutton _summary_
 
         :param Path midifile: _description_
+        :param dict smf: information about the MIDI file
         :param int dt: _description_
         """
-        smf: dict = MF.info_midifile(midifile)
         midititlebutton = MidiTitleButton(
             text=smf["title"],
             total_tick=smf["total_tick"],
             filename="mid/" + midifile.name,
             channels_preset=smf["channels_preset"],
+            tempo_map=smf["tempo_map"],
         )
         midititlebutton.bind(on_press=self.select)
         self.midifiles.add_widget(midititlebutton)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Render MIDI files to audio files offline, in worker processes.
+
+Each worker has its own synthesizer, see :class:`FS.FileRenderer`. A MIDI file
+is rendered whole, or split into one stem per channel by muting the other
+channels with MIDI router rules.
+"""
+
+from argparse import ArgumentParser
+from concurrent import futures
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter
+from typing import Union
+
+from ..libs.audio import fluidsynth as FS
+from ..libs.sublibs import paramsmid as PMID
+from ..libs.sublibs import polyphony as PP
+from . import midifile as MF
+
+
+def render(midifile: str, filename: str, channel: Union[int, None] = None) -> dict:
+    """Render a MIDI file to an audio file, in a worker process.
+
+    :param str midifile: MIDI file
+    :param str filename: audio file, WAV
+    :param int channel: the only channel not muted, None for all channels
+    :return: result of :meth:`FS.FileRenderer.render`
+    """
+    # the other workers use the other cores
+    overrides = PP.profile(Path(midifile)).synth_settings(cores=1)
+    frfs = FS.FileRenderer(
+        **dict(MF.kwargs, standardmidifile=[midifile], standardmidibuffer=[]),
+        overrides=overrides,
+        filename=filename,
+    )
+    if channel is not None:
+        frfs.apply_rules(
+            MF.mute_rule_set(**{str(chan): chan != channel for chan in range(16)})
+        )
+    result = frfs.render()
+    del frfs
+    return result
+
+
+def render_files(
+    midifiles: list, outdir: Path, max_workers: Union[int, None] = None
+) -> dict:
+    """Render MIDI files, one audio file each.
+
+    :param list midifiles: MIDI files
+    :param Path outdir: folder of audio files
+    :param int max_workers: number of worker processes, None for the CPU count
+    :return: {audio file: result of :func:`render`, or the exception}
+    """
+    jobs = {outdir / f"{Path(m).stem}.wav": (str(m), None) for m in midifiles}
+    return _run(jobs, outdir, max_workers)
+
+
+def render_stems(
+    midifiles: list, outdir: Path, max_workers: Union[int, None] = None
+) -> dict:
+    """Render MIDI files to one audio file per channel with notes.
+
+    :param list midifiles: MIDI files
+    :param Path outdir: folder of audio files, "<name>.ch00.wav" ...
+    :param int max_workers: number of worker processes, None for the CPU count
+    :return: {audio file: result of :func:`render`, or the exception}
+    """
+    jobs: dict = dict()
+    for midifile in map(Path, midifiles):
+        smf = PMID.StandardMidiFile(midifile, lazy=True)
+        for channel in sorted({ev.channel for ev in smf.events(types=(0x90,))}):
+            jobs[outdir / f"{midifile.stem}.ch{channel:02}.wav"] = (
+                str(midifile),
+                channel,
+            )
+    return _run(jobs, outdir, max_workers)
+
+
+def _run(jobs: dict, outdir: Path, max_workers: Union[int, None]) -> dict:
+    """Render on a process pool, printing the time of each file and the total.
+
+    :param dict jobs: {audio file: (MIDI file, channel)}
+    :param Path outdir: folder of audio files
+    :param int max_workers: number of worker processes
+    :return: {audio file: result of :func:`render`, or the exception}
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    results: dict = dict()
+    start = perf_counter()
+    # "spawn": workers do not inherit the audio and UI threads
+    with futures.ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=get_context("spawn")
+    ) as executor:
+        tasks = {
+            executor.submit(render, midifile, str(filename), channel): filename
+            for filename, (midifile, channel) in jobs.items()
+        }
+        for task in futures.as_completed(tasks):
+            filename = tasks[task]
+            if task.exception() is None:
+                results[filename] = result = task.result()
+                print(
+                    f"{filename.name}: {result['seconds']:.1f} s in "
+                    f"{result['elapsed']:.1f} s, x{result['realtime_factor']:.1f}"
+                )
+            else:
+                results[filename] = task.exception()
+                print(f"{filename.name}: failed, {results[filename]}")
+
+    elapsed = perf_counter() - start
+    seconds = sum(r["seconds"] for r in results.values() if isinstance(r, dict))
+    print(
+        f"{len(results)} files, {seconds:.1f} s of audio in {elapsed:.1f} s, "
+        f"x{seconds / elapsed:.1f} real time"
+    )
+    return results
+
+
+def main() -> None:
+    """Render MIDI files to WAV files, "render [-h]"."""
+
+    parser = ArgumentParser(description="Render MIDI files to WAV files.")
+    parser.add_argument("midifile", nargs="+", help="MIDI files")
+    parser.add_argument("-o", "--output", default="wav", help="folder of WAV files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="processes")
+    parser.add_argument(
+        "-s", "--stems", action="store_true", help="one WAV file per channel"
+    )
+    args = parser.parse_args()
+
+    function = render_stems if args.stems else render_files
+    results = function(args.midifile, Path(args.output), args.jobs)
+    if any(isinstance(result, Exception) for result in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    print(__file__)
@@ -18,9 +18,25 @@ def screens() -> None:
     fs_settings = "config/fluidsynth.json"
     sfonts = ["sf2/FluidR3_GM.sf2"]
 
-    settings["keyboard"] = {"settings": fs_settings, "soundfont": sfonts}
-    settings["metronome"] = {"settings": fs_settings, "soundfont": sfonts}
-    settings["player"] = {"settings": fs_settings, "soundfont": sfonts}
+    # one synthesizer shared by the child screens, 16 channels each, samples
+    # loaded only for the selected presets, the player resets only its channels
+    settings["engine"] = {
+        "settings": fs_settings,
+        "overrides": {
+            "synth.midi-channels": 64,
+            "synth.dynamic-sample-loading": 1,
+            "player.reset-synth": 0,
+        },
+        "soundfont": sfonts,
+    }
+    for partition, screen in enumerate(["player", "keyboard", "metronome"]):
+        settings[screen] = {
+            "settings": fs_settings,
+            "soundfont": sfonts,
+            "partition": partition,
+        }
+    # partition holding the presets of the song, see Synthesizer.preload()
+    settings["player"]["preload"] = 3
 
     with open("config/screen.json", "wt") as fw:
         dump(settings, fw, indent=4)
@@ -2,7 +2,11 @@
 # -*- coding: utf-8 -*-
 """Create MID file from CSV file."""
 
+from argparse import ArgumentParser
+from concurrent import futures
 from pathlib import Path
+from time import perf_counter
+from typing import Union
 
 
 from ..libs.sublibs import csv2mid as C2M
@@ -24,5 +28,96 @@ def midfile():
     C2M.generate(csvfile=f"{cwd}/{CSV_FILENAME}", midifile=MID_FILENAME)
 
 
+def convert(csvfile: Path, midifile: Path) -> float:
+    """Create a MID file from a CSV file.
+
+    :param Path csvfile: CSV file
+    :param Path midifile: MID file, removed if partly written
+    :return: seconds taken
+    """
+    start = perf_counter()
+    try:
+        C2M.generate(csvfile=str(csvfile), midifile=str(midifile))
+    except BaseException:
+        # a partial file newer than the CSV file would be taken as up to date
+        midifile.unlink(missing_ok=True)
+        raise
+    return perf_counter() - start
+
+
+def outdated(csvfile: Path, midifile: Path) -> bool:
+    """Find out if the MID file is older than its CSV file.
+
+    :param Path csvfile: CSV file
+    :param Path midifile: MID file
+    :return: True if the MID file is missing or older
+    """
+    if not midifile.exists():
+        return True
+    return midifile.stat().st_mtime_ns < csvfile.stat().st_mtime_ns
+
+
+def midfiles(
+    csvdir: Path,
+    middir: Path = Path("mid"),
+    max_workers: Union[int, None] = None,
+    force: bool = False,
+) -> dict:
+    """Create MID files from all CSV files of a folder, in worker processes.
+
+    MID files newer than their CSV file are skipped.
+
+    :param Path csvdir: folder of CSV files
+    :param Path middir: folder of MID files
+    :param int max_workers: number of worker processes, None for the CPU count
+    :param bool force: convert even if up to date
+    :return: {CSV file: seconds taken, None if skipped, or the exception}
+    """
+    middir.mkdir(parents=True, exist_ok=True)
+    results: dict = dict()
+    with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        tasks: dict = dict()
+        for csvfile in sorted(csvdir.glob("*.csv")):
+            midifile = middir / f"{csvfile.stem}.mid"
+            if force or outdated(csvfile, midifile):
+                tasks[executor.submit(convert, csvfile, midifile)] = csvfile
+            else:
+                results[csvfile] = None
+                print(f"{csvfile.name}: up to date")
+
+        for task in futures.as_completed(tasks):
+            csvfile = tasks[task]
+            if task.exception() is None:
+                results[csvfile] = task.result()
+                print(f"{csvfile.name}: {results[csvfile]:.3f} s")
+            else:
+                results[csvfile] = task.exception()
+                print(f"{csvfile.name}: failed, {results[csvfile]}")
+    return results
+
+
+def main() -> None:
+    """Create MID files from CSV files, "csv2mid [-h]"."""
+
+    parser = ArgumentParser(description="Create MID files from CSV files.")
+    parser.add_argument(
+        "csvdir",
+        nargs="?",
+        default=str(Path(__file__).parents[1] / "middata"),
+        help="folder of CSV files",
+    )
+    parser.add_argument("-o", "--output", default="mid", help="folder of MID files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="processes")
+    parser.add_argument("-f", "--force", action="store_true", help="convert all")
+    args = parser.parse_args()
+
+    start = perf_counter()
+    results = midfiles(Path(args.csvdir), Path(args.output), args.jobs, args.force)
+    failed = [k for k, result in results.items() if isinstance(result, Exception)]
+    print(f"{len(results)} files, {len(failed)} failed, {perf_counter() - start:.3f} s")
+    if failed:
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
     print(__file__)
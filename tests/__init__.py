@@ -4,5 +4,12 @@ test_asound: test libs/audio/asound.py and libs/audio/btaudiosink.py
 
 test_fluidsynth: test libs/audio/fluidsynth.py
 
-test_paramsmid: test libs/sublibs/paramsmid.py and libs/sublibs/csv2mid.py
+test_paramsmid: test libs/sublibs/paramsmid.py, libs/sublibs/csv2mid.py,
+    libs/sublibs/mid2csv.py and setup/middata.py
+
+test_midilibrary: test libs/sublibs/midilibrary.py
+
+test_polyphony: test libs/sublibs/polyphony.py
+
+test_paramsf2: test libs/sublibs/paramsf2.py
 """
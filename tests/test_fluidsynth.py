@@ -4,6 +4,7 @@
 
 
 import unittest
+import wave
 
 from concurrent import futures
 from functools import partial
@@ -11,10 +12,20 @@ import ctypes as C
 from time import sleep
 from typing import Callable
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
 
 from audioworkstation.libs.audio import asound as MASTER
 from src.audioworkstation.libs.audio import fluidsynth as FS
+from audioworkstation.libs.sublibs import csv2mid as C2M
+
+CSV_FILENAME = "src/audioworkstation/middata/example.csv"
+#: kwargs of the shared engine, whichever test makes it first
+ENGINE_KWARGS = {
+    "settings": "config/fluidsynth.json",
+    "overrides": {"synth.midi-channels": 64, "synth.dynamic-sample-loading": 1},
+    "soundfont": ["sf2/FluidR3_GM.sf2"],
+}
 
 sfs: FS.Sequencer
 
@@ -186,6 +197,95 @@ class TestFluidsynth(unittest.TestCase):
         sleep(0.5)
         del sfs
 
+    def test_notes_at(self):
+        """test Sequencer.notes_at"""
+        kwargs = {
+            "settings": "config/fluidsynth.json",
+            "soundfont": ["sf2/FluidR3_GM.sf2"],
+        }
+
+        sfs = FS.Sequencer(**kwargs)
+        sfs.bps = 120
+        start = sfs.tick + sfs._quaternote
+        notes = [(start + i * 120, 9, 42, 100 - i * 10, 60) for i in range(8)]
+        self.assertEqual(sfs.notes_at(notes, destination=sfs.clients[0]), 8)
+        sleep(2)
+        del sfs
+
+    def test_engine(self):
+        """test partitions of the shared synthesizer"""
+        engine = FS.engine(**ENGINE_KWARGS)
+        self.assertIs(FS.engine(), engine)
+
+        mdfs = FS.MidiDriver(engine=engine, partition=1)
+        sfs = FS.Sequencer(engine=engine, partition=2)
+        sfs.drum_channel(9)
+        self.assertEqual(mdfs.soundfonts, engine.soundfonts)
+
+        mdfs.note_on(0, 60, 100)
+        sfs.note_on(9, 42, 100)
+        sleep(0.5)
+        mdfs.note_off(0, 60)
+
+        # the gain and the reset of a partition leave the others alone
+        mdfs.program_select(0, 1, 0, 40)
+        sfs.gain = engine.gain / 4
+        self.assertEqual(mdfs.gain, engine.gain)
+        # the engine follows the loudest partition
+        gain = mdfs.gain
+        mdfs.gain = gain * 4
+        self.assertAlmostEqual(engine.gain, gain * 4, places=5)
+        self.assertAlmostEqual(sfs.gain, gain / 4, places=5)
+        mdfs.gain = gain
+        mpfs = FS.MidiPlayer(
+            engine=engine, standardmidibuffer=[C2M.generate_bytes(CSV_FILENAME)]
+        )
+        self.assertEqual(mdfs.channels_preset()[0]["num"], 40)
+        self.assertEqual(sfs.channels_preset()[9]["bank"], 128)
+        del mpfs
+        del mdfs, sfs
+        engine.note_on(9, 34, 80)  # the engine lives on
+        sleep(0.5)
+
+    def test_engine_song_reset(self):
+        """test GM System On of a song resets only the partition of the player"""
+        engine = FS.engine(**ENGINE_KWARGS)
+        keyboard = FS.Synthesizer(engine=engine, partition=1)
+        keyboard.program_select(0, 1, 0, 40)
+        mpfs = FS.MidiPlayer(
+            engine=engine, partition=0, standardmidifile=["mid/example.mid"]
+        )
+        with futures.ThreadPoolExecutor(max_workers=1) as e:
+            e.submit(mpfs.playback, 0)
+            sleep(1)
+            mpfs.stop()
+        self.assertEqual(keyboard.channels_preset()[0]["num"], 40)
+        del mpfs, keyboard
+
+    def test_preload(self):
+        """test Synthesizer.preload"""
+        synth = FS.Synthesizer(
+            settings="config/fluidsynth.json",
+            overrides={"synth.dynamic-sample-loading": 1},
+            soundfont=["sf2/FluidR3_GM.sf2"],
+        )
+        self.assertEqual(synth.preload([(0, 0), (0, 40), (128, 0)]), 3)
+        self.assertEqual(synth.channels_preset()[1]["num"], 40)
+        self.assertEqual(synth.preload([]), 0)
+        del synth
+
+    def test_preload_engine(self):
+        """test presets preloaded on the engine stay selected when a song loads"""
+        engine = FS.engine(**ENGINE_KWARGS)
+        preloader = FS.Synthesizer(engine=engine, partition=3)
+        mpfs = FS.MidiPlayer(engine=engine, partition=0)
+        self.assertEqual(preloader.preload([(0, 40), (128, 0)]), 2)
+        mpfs.load(standardmidibuffer=[C2M.generate_bytes(CSV_FILENAME)])
+        presets = preloader.channels_preset()
+        self.assertEqual((presets[0]["bank"], presets[0]["num"]), (0, 40))
+        self.assertEqual((presets[1]["bank"], presets[1]["num"]), (128, 0))
+        del mpfs, preloader
+
     def test_midi_player(self):
         # test class MidiPlayerFS
 
@@ -214,6 +314,53 @@ class TestFluidsynth(unittest.TestCase):
                 f = e.submit(mpfs.playback, mpfs.total_ticks - 1000)
                 f.add_done_callback(partial(future_callback, mpfs.stop))
 
+    def test_midi_player_load(self):
+        """test MidiPlayer.load, files swapped on the same player"""
+        smf = C2M.generate_bytes(CSV_FILENAME)
+        mpfs = FS.MidiPlayer(
+            settings="config/fluidsynth.json",
+            soundfont=["sf2/FluidR3_GM.sf2"],
+            standardmidibuffer=[smf],
+        )
+        with futures.ThreadPoolExecutor(max_workers=1) as e:
+            e.submit(mpfs.playback, 0)
+            sleep(1)
+            tick = mpfs.stop()
+            self.assertGreater(tick, 0)
+            e.submit(mpfs.playback, tick)  # resumed on the same player
+            sleep(1)
+            self.assertGreater(mpfs.stop(), tick)
+
+            mpfs.load(standardmidibuffer=[smf])
+            self.assertEqual(mpfs.tick, 0)
+            e.submit(mpfs.playback, 0)
+            sleep(1)
+            mpfs.stop()
+        del mpfs
+
+    def test_file_renderer(self):
+        """test class FileRenderer"""
+        with TemporaryDirectory() as tmpdir:
+            filename = Path(tmpdir, "example.wav")
+            frfs = FS.FileRenderer(
+                settings="config/fluidsynth.json",
+                soundfont=["sf2/FluidR3_GM.sf2"],
+                standardmidibuffer=[C2M.generate_bytes(CSV_FILENAME)],
+                filename=str(filename),
+                fileformat="s16",
+            )
+            result = frfs.render(tail=0.5)
+            del frfs
+            self.assertGreater(result["seconds"], 4.0)
+            self.assertGreater(result["realtime_factor"], 1.0)
+            with wave.open(str(filename), "rb") as wav:
+                self.assertEqual(wav.getsampwidth(), 2)
+                seconds = wav.getnframes() / wav.getframerate()
+            self.assertAlmostEqual(seconds, result["seconds"], places=2)
+
+        with self.assertRaises(ValueError):
+            FS.FileRenderer(engine=FS.engine(**ENGINE_KWARGS), filename=str(filename))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""unittest setup/middata.py"""
+
+import shutil
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from audioworkstation.setup import middata as MD
+
+
+CSV_FILENAME = "src/audioworkstation/middata/example.csv"
+
+
+class TestMiddata(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = TemporaryDirectory()
+        self.csvdir = Path(self.tempdir.name, "csv")
+        self.middir = Path(self.tempdir.name, "mid")
+        self.csvdir.mkdir()
+        shutil.copy(CSV_FILENAME, self.csvdir / "good.csv")
+        (self.csvdir / "bad.csv").write_text(
+            'Sequencer,0,0,"Meta Event","Unknown Event"\n'
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+        return super().tearDown()
+
+    def test_midfiles(self) -> None:
+        good, bad = self.csvdir / "good.csv", self.csvdir / "bad.csv"
+        results = MD.midfiles(self.csvdir, self.middir, max_workers=1)
+        self.assertIsInstance(results[good], float)
+        self.assertIsInstance(results[bad], Exception)
+        self.assertFalse((self.middir / "bad.mid").exists())
+
+        # the failed file is converted again, the good one is up to date
+        results = MD.midfiles(self.csvdir, self.middir, max_workers=1)
+        self.assertIsNone(results[good])
+        self.assertIsInstance(results[bad], Exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
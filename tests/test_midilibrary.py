@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""unittest libs/sublibs/midilibrary.py"""
+
+import sqlite3
+import unittest
+from os import utime
+from threading import Event
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from audioworkstation.libs.sublibs import midilibrary as ML
+from audioworkstation.libs.sublibs import csv2mid as C2M
+
+
+CSV_FILENAME = "src/audioworkstation/middata/example.csv"
+MID_FILENAME = "mid/example.mid"
+
+
+class TestMidiLibrary(unittest.TestCase):
+    def setUp(self) -> None:
+        C2M.generate(csvfile=CSV_FILENAME, midifile=MID_FILENAME)
+
+        self.tempdir = TemporaryDirectory()
+        self.library = ML.MidiLibrary(f"{self.tempdir.name}/midilibrary.db")
+        self.midifile = Path(MID_FILENAME)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.library.close()
+        self.tempdir.cleanup()
+        return super().tearDown()
+
+    def test_info(self) -> None:
+        self.assertIsNone(self.library.lookup(self.midifile))
+        info = self.library.info(self.midifile)
+        self.assertEqual(info["title"], "example title")
+        self.assertEqual(info["total_tick"], 3840)
+        self.assertEqual(info["instruments"], ["Piano", "Piano"])
+        self.assertEqual(info["lyrics_count"], 1)
+        self.assertAlmostEqual(info.pop("tempo_map").total_seconds, 4.0)
+        lookup = self.library.lookup(self.midifile)
+        tempo_map = lookup.pop("tempo_map")
+        self.assertAlmostEqual(tempo_map.total_seconds, 4.0)
+        self.assertEqual(tempo_map.bar_beat(3840), (2, 0, 0))
+        self.assertEqual(lookup, info)
+
+    def test_schema_version(self) -> None:
+        database = f"{self.tempdir.name}/old.db"
+        with sqlite3.connect(database) as connection:
+            connection.execute("CREATE TABLE midifile (path TEXT PRIMARY KEY)")
+        library = ML.MidiLibrary(database)
+        try:
+            self.assertEqual(library.info(self.midifile)["total_tick"], 3840)
+        finally:
+            library.close()
+
+    def test_modified(self) -> None:
+        self.library.info(self.midifile)
+        stat = self.midifile.stat()
+        utime(self.midifile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertIsNone(self.library.lookup(self.midifile))
+
+    def test_prune(self) -> None:
+        self.library.info(self.midifile)
+        self.assertEqual(self.library.prune([self.midifile]), 0)
+        self.assertEqual(self.library.prune([]), 1)
+        self.assertIsNone(self.library.lookup(self.midifile))
+
+
+class TestLibraryScanner(unittest.TestCase):
+    def setUp(self) -> None:
+        C2M.generate(csvfile=CSV_FILENAME, midifile=MID_FILENAME)
+
+        self.tempdir = TemporaryDirectory()
+        self.broken = Path(f"{self.tempdir.name}/broken.mid")
+        self.broken.write_bytes(Path(MID_FILENAME).read_bytes()[:40])
+        self.results: dict = dict()
+        self.finished = Event()
+        self.scanner = ML.LibraryScanner(self.done, max_workers=2)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.scanner.cancel()
+        self.tempdir.cleanup()
+        return super().tearDown()
+
+    def done(self, midifile, stat, items, error) -> None:
+        self.results[midifile] = (items, error)
+        if len(self.results) == 2:
+            self.finished.set()
+
+    def test_scan(self) -> None:
+        self.scanner.submit(self.broken)
+        self.scanner.submit(Path(MID_FILENAME))
+        self.assertTrue(self.finished.wait(60))
+
+        items, error = self.results[Path(MID_FILENAME)]
+        self.assertIsNone(error)
+        self.assertEqual(items["title"], "example title")
+        items, error = self.results[self.broken]
+        self.assertIsNone(items)
+        self.assertIsInstance(error, Exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""unittest libs/sublibs/paramsf2.py"""
+
+import os
+import struct
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from audioworkstation.libs.sublibs import paramsf2 as PSF2
+
+
+def chunk(chunk_id: bytes, data: bytes) -> bytes:
+    return chunk_id + struct.pack("<I", len(data)) + data + b"\0" * (len(data) & 1)
+
+
+def soundfont(name: str, presets: list) -> bytes:
+    """A SF2 file without samples.
+
+    :param str name: name of the soundfont, INAM
+    :param list presets: [(bank, num, name), ...]
+    """
+    phdr = b"".join(
+        PSF2.PRESET_HEADER.pack(n.encode(), num, bank, i, 0, 0, 0)
+        for i, (bank, num, n) in enumerate(presets + [(0, 0, "EOP")])
+    )
+    info = chunk(b"ifil", struct.pack("<HH", 2, 1)) + chunk(b"INAM", name.encode())
+    return chunk(
+        b"RIFF",
+        b"sfbk"
+        + chunk(b"LIST", b"INFO" + info)
+        + chunk(b"LIST", b"sdta" + chunk(b"smpl", b"\0" * 64))
+        + chunk(b"LIST", b"pdta" + chunk(b"phdr", phdr)),
+    )
+
+
+class TestParamSf2(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = TemporaryDirectory()
+        self.gm = Path(self.tmpdir.name, "gm.sf2")
+        self.gm.write_bytes(
+            soundfont(
+                "General MIDI",
+                [(0, 0, "Piano"), (0, 1, "Bright Piano"), (128, 0, "Standard")],
+            )
+        )
+        self.piano = Path(self.tmpdir.name, "piano.sf3")
+        self.piano.write_bytes(soundfont("Grand", [(0, 0, "Grand Piano")]))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def test_scan(self) -> None:
+        self.assertEqual(
+            PSF2.scan(self.gm),
+            {
+                "name": "General MIDI",
+                "presets": [
+                    [0, 0, "Piano"],
+                    [0, 1, "Bright Piano"],
+                    [128, 0, "Standard"],
+                ],
+            },
+        )
+        broken = Path(self.tmpdir.name, "broken.sf2")
+        broken.write_bytes(b"RIFF\x04\0\0\0WAVE")
+        with self.assertRaises(PSF2.Sf2Error):
+            PSF2.scan(broken)
+        broken.write_bytes(b"")
+        with self.assertRaises(PSF2.Sf2Error):
+            PSF2.scan(broken)
+
+    def test_index(self) -> None:
+        filename = str(Path(self.tmpdir.name, "sf2index.json"))
+
+        def name() -> str:
+            return PSF2.PresetIndex(filename).presets(self.piano)["name"]
+
+        self.assertEqual(name(), "Grand")
+
+        # served from the index while the size and modification time are the same
+        stat = self.piano.stat()
+        self.piano.write_bytes(soundfont("GRAND", [(0, 0, "GRAND PIANO")]))
+        os.utime(self.piano, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(name(), "Grand")
+
+        os.utime(self.piano, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(name(), "GRAND")
+
+    def test_gm_sound_set(self) -> None:
+        index = PSF2.PresetIndex(str(Path(self.tmpdir.name, "sf2index.json")))
+        sound_set, percussion_sound_set = index.gm_sound_set([self.gm, self.piano])
+        self.assertEqual(len(sound_set), 128)
+        self.assertEqual(
+            sound_set[0], {"name": "Grand Piano", "num": 0, "bank": 0, "sfont_id": 2}
+        )
+        self.assertEqual(sound_set[1]["sfont_id"], 1)
+        self.assertEqual(sound_set[2]["name"], None)
+        self.assertEqual(percussion_sound_set[0]["name"], "Standard")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-"""unittest libs/sublibs/paramsmid.py and libs/sublibs/csv2mid.py"""
+"""unittest libs/sublibs/paramsmid.py, libs/sublibs/csv2mid.py,
+libs/sublibs/mid2csv.py and setup/middata.py"""
 
+import csv
+import os
+import shutil
+import struct
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
 
 from audioworkstation.libs.sublibs import paramsmid as PMID
 from audioworkstation.libs.sublibs import csv2mid as C2M
+from audioworkstation.libs.sublibs import mid2csv as M2C
+from audioworkstation.setup import middata as MD
 
 
 CSV_FILENAME = "src/audioworkstation/middata/example.csv"
@@ -36,6 +46,263 @@ class TestSMF(unittest.TestCase):
     def test_total_tick(self) -> None:
         self.assertEqual(self.midifile.total_tick(), 3840)
 
+    def test_tempo_map(self) -> None:
+        tempo_map = self.midifile.tempo_map()
+        self.assertAlmostEqual(tempo_map.seconds(960), 1.0)
+        self.assertAlmostEqual(tempo_map.total_seconds, 4.0)
+        self.assertEqual(tempo_map.tick(1.5), 1440)
+        self.assertEqual(tempo_map.bar_beat(2500), (1, 1, 100))
+
+
+class TestColumnarSMF(TestSMF):
+    def setUp(self) -> None:
+        super().setUp()
+        self.midifile = PMID.StandardMidiFile(Path(MID_FILENAME), columnar=True)
+
+    def test_tables(self) -> None:
+        events = np.concatenate(self.midifile.tables())
+        self.assertEqual(events.dtype, PMID.EVENT_DTYPE)
+        self.assertEqual(len(events[events["status"] == 0x90]), 8)
+
+
+class TestMmapSMF(TestSMF):
+    def setUp(self) -> None:
+        super().setUp()
+        self.midifile = PMID.StandardMidiFile(Path(MID_FILENAME), use_mmap=True)
+
+    def tearDown(self) -> None:
+        self.midifile.close()
+        return super().tearDown()
+
+
+class TestMmapColumnarSMF(TestSMF):
+    def setUp(self) -> None:
+        super().setUp()
+        self.midifile = PMID.StandardMidiFile(
+            Path(MID_FILENAME), columnar=True, use_mmap=True
+        )
+
+    def tearDown(self) -> None:
+        self.midifile.close()
+        return super().tearDown()
+
+
+class TestLazySMF(TestSMF):
+    def setUp(self) -> None:
+        super().setUp()
+        self.midifile = PMID.StandardMidiFile(Path(MID_FILENAME), lazy=True)
+
+    def test_events(self) -> None:
+        ticks = [event.tick for event in self.midifile.events()]
+        self.assertEqual(ticks, sorted(ticks))
+        notes = list(self.midifile.events(channels=(0,), types=(0x90,)))
+        self.assertEqual(len(notes), 4)
+        self.assertTrue(all(event.channel == 0 for event in notes))
+        self.assertEqual(
+            len(list(self.midifile.events(channels=(15,)))),
+            len(list(self.midifile.events(types=(0xFF, 0xF0, 0xF7)))),
+        )
+
+
+class TestSmfStreamParser(unittest.TestCase):
+    def setUp(self) -> None:
+        C2M.generate(csvfile=CSV_FILENAME, midifile=MID_FILENAME)
+        smf = PMID.StandardMidiFile(Path(MID_FILENAME), lazy=True)
+        self.expected = sorted(smf.events(), key=lambda event: event.track)
+        return super().setUp()
+
+    def test_feed(self) -> None:
+        data = Path(MID_FILENAME).read_bytes()
+        for size in (1, 3, 7, len(data)):
+            parser = PMID.SmfStreamParser()
+            events = list()
+            for start in range(0, len(data), size):
+                parser.feed(data[start : start + size])
+                events += list(parser.events())
+            self.assertEqual(events, self.expected)
+            self.assertEqual(parser.header[4], 480)
+
+    def test_stream_events(self) -> None:
+        events = list(PMID.stream_events(Path(MID_FILENAME), chunk_size=5))
+        self.assertEqual(events, self.expected)
+
+
+class TestCsv2Mid(unittest.TestCase):
+    def test_event_data(self) -> None:
+        line = ["Main", "0", "100", "Midi Event", "Control Change", "Pan", "0", "0x50"]
+        event = C2M.event_data(line)
+        self.assertIsInstance(event, C2M.Pan)
+        self.assertEqual((event.n, event.vv, event.event_time), ("0", "0x50", 100))
+        self.assertIsNone(C2M.event_data(["Main", "0", "0", "Midi Event", "Unknown"]))
+
+    def test_variable_length_quantities(self) -> None:
+        values = [0, 0x40, 0x7F, 0x80, 0x2000, 0x3FFF, 0x4000, 0x100000, 0x0FFFFFFF]
+        quantities, offsets = C2M.variable_length_quantities(np.array(values))
+        self.assertEqual(
+            [quantities[offsets[i] : offsets[i + 1]] for i in range(len(values))],
+            [C2M._convert_to_variable_length_quantity(value) for value in values],
+        )
+        self.assertEqual(quantities[offsets[3] : offsets[4]], b"\x81\x00")
+        self.assertEqual(quantities[offsets[8] :], b"\xFF\xFF\xFF\x7F")
+
+    def test_records(self) -> None:
+        lines = [
+            ["Main", "1", "0", "Meta Event", "End Of Track"],
+            ["Main", "0", "480", "Midi Event", "Note On", "0", "62", "0x40", "100"],
+            ["Main", "0", "0", "Midi Event", "Note On", "0", "60", "0x40", "480"],
+            ["Main", "0", "1820", "Midi Event", "Note On", "0", "64", "0x40", "100"],
+        ]
+        records: list = list()
+        for line in lines:
+            event = C2M.event_data(line)
+            if isinstance(event, C2M.NoteOn):
+                records += event.records()
+            else:
+                records.append(event.record())
+        records.sort(key=C2M.EventRecord.key)
+        self.assertEqual(
+            [(record.event_time, record.data[:2]) for record in records],
+            [
+                (0, b"\x90\x3c"),
+                (480, b"\x80\x3c"),
+                (480, b"\x90\x3e"),
+                (580, b"\x80\x3e"),
+                (1820, b"\x90\x40"),
+                (1920, b"\x80\x40"),
+                (1920, b"\xff\x2f"),
+            ],
+        )
+
+    def test_generate_bytes(self) -> None:
+        C2M.generate(csvfile=CSV_FILENAME, midifile=MID_FILENAME)
+        data = C2M.generate_bytes(CSV_FILENAME)
+        self.assertEqual(data, Path(MID_FILENAME).read_bytes())
+        self.assertEqual(PMID.StandardMidiFile(data).title(), "example title")
+
+    def test_first_delta_time(self) -> None:
+        C2M.generate(csvfile=CSV_FILENAME, midifile=MID_FILENAME)
+        smf = PMID.StandardMidiFile(Path(MID_FILENAME), lazy=True)
+        first = [event.tick for event in smf.events() if event.track == 1][0]
+        self.assertEqual(first, 100)
+
+    def test_bar_table(self) -> None:
+        bars = C2M.BarTable([(0, 4, 2), (2, 7, 3), (3, 3, 2)])
+        self.assertEqual(
+            [bars.tick(bar) for bar in range(6)], [0, 1920, 3840, 5520, 6960, 8400]
+        )
+        self.assertEqual(C2M.BarTable().tick(3), 5760)
+
+    def test_time_signature_changes(self) -> None:
+        lines = [
+            ["Seq", "0", "0", "Meta Event", "Set Tempo", "500000"],
+            ["Seq", "0", "0", "Meta Event", "Time Signature", "3", "2", "24", "8"],
+            ["Seq", "2", "0", "Meta Event", "Time Signature", "7", "3", "24", "8"],
+            ["Seq", "2", "0", "Meta Event", "Set Tempo", "250000"],
+            ["Seq", "4", "0", "Meta Event", "End Of Track"],
+            ["Main", "2", "240", "Midi Event", "Note On", "0", "60", "0x40", "100"],
+            ["Main", "4", "0", "Meta Event", "End Of Track"],
+        ]
+        with TemporaryDirectory() as tmpdir:
+            csvfile = Path(tmpdir, "odd.csv")
+            with csvfile.open("w", newline="") as f:
+                csv.writer(f, dialect="unix").writerows(lines)
+            smf = PMID.StandardMidiFile(C2M.generate_bytes(str(csvfile)), lazy=True)
+
+        self.assertEqual(smf.total_tick(), 2880 + 2 * 1680)
+        tempo_map = smf.tempo_map()
+        note = [event.tick for event in smf.events(types=(0x90,))][0]
+        self.assertEqual((note, tempo_map.bar_beat(note)), (3120, (2, 1, 0)))
+        self.assertAlmostEqual(tempo_map.total_seconds, 3.0 + 1.75)
+
+
+class TestMid2Csv(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        C2M.generate(csvfile=CSV_FILENAME, midifile=MID_FILENAME)
+        with TemporaryDirectory() as tmpdir:
+            csvfile = str(Path(tmpdir, "example.csv"))
+            M2C.generate(midifile=MID_FILENAME, csvfile=csvfile, chunk_size=7)
+            data = C2M.generate_bytes(csvfile)
+        self.assertEqual(data, Path(MID_FILENAME).read_bytes())
+
+    def test_csv_lines(self) -> None:
+        track = b"\x00\xff\x58\x04\x03\x02\x18\x08"  # 3/4
+        track += b"\x00\x90\x3c\x40\x00\xb0\x00\x01"  # note on, bank select
+        track += b"\x81\x40\x80\x3e\x20"  # note off without note on, tick 192
+        track += b"\x81\x40\x3c\x00"  # note off by running status, tick 384
+        track += b"\x00\xff\x2f\x00"
+        smf = struct.pack(">4sLHHH", b"MThd", 6, 0, 1, 96)
+        smf += struct.pack(">4sL", b"MTrk", len(track)) + track
+        with TemporaryDirectory() as tmpdir:
+            midifile = Path(tmpdir, "small.mid")
+            midifile.write_bytes(smf)
+            lines = list(M2C.csv_lines(midifile))
+        self.assertEqual(
+            lines,
+            [
+                ["Track0", 0, 0, "Meta Event", "Time Signature", 3, 2, 24, 8],
+                ["Track0", 0, 0, "Midi Event", "Note On", 0, 60, 64, 1920],
+                ["Track0", 0, 960, "Midi Event", "Note Off", 0, 62, 32],
+                ["Track0", 1, 480, "Meta Event", "End Of Track"],
+            ],
+        )
+
+
+class TestMidfiles(unittest.TestCase):
+    def test_midfiles(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            csvdir, middir = Path(tmpdir, "csv"), Path(tmpdir, "mid")
+            csvdir.mkdir()
+            for name in ("a", "b"):
+                shutil.copy(CSV_FILENAME, csvdir / f"{name}.csv")
+
+            results = MD.midfiles(csvdir, middir, max_workers=2)
+            self.assertEqual(sorted(results), [csvdir / "a.csv", csvdir / "b.csv"])
+            self.assertTrue(all(isinstance(t, float) for t in results.values()))
+            self.assertEqual(
+                (middir / "a.mid").read_bytes(), C2M.generate_bytes(CSV_FILENAME)
+            )
+
+            mtime = (middir / "b.mid").stat().st_mtime_ns
+            os.utime(csvdir / "b.csv", ns=(mtime + 1, mtime + 1))
+            results = MD.midfiles(csvdir, middir, max_workers=2)
+            self.assertIsNone(results[csvdir / "a.csv"])
+            self.assertIsInstance(results[csvdir / "b.csv"], float)
+
+
+class TestScanMetadata(unittest.TestCase):
+    def setUp(self) -> None:
+        C2M.generate(csvfile=CSV_FILENAME, midifile=MID_FILENAME)
+        return super().setUp()
+
+    def test_scan_metadata(self) -> None:
+        smf = PMID.StandardMidiFile(Path(MID_FILENAME))
+        self.assertEqual(
+            PMID.scan_metadata(Path(MID_FILENAME)),
+            {
+                "title": smf.title(),
+                "total_tick": smf.total_tick(),
+                "channels_preset": smf.channels_preset(),
+            },
+        )
+
+    def test_scan_tempo_map(self) -> None:
+        tempo_map = PMID.scan_metadata(Path(MID_FILENAME), ("tempo_map",))["tempo_map"]
+        self.assertAlmostEqual(tempo_map.total_seconds, 4.0)
+        self.assertEqual(tempo_map.bar_beat(3840), (2, 0, 0))
+
+    def test_tempo_changes(self) -> None:
+        tempo_map = PMID.TempoMap(
+            480, [(0, 500000), (960, 250000)], [(0, 4, 2), (1920, 3, 2)], 3360
+        )
+        self.assertAlmostEqual(tempo_map.seconds(1920), 1.5)
+        self.assertEqual(tempo_map.tick(1.25), 1440)
+        self.assertEqual(tempo_map.bar_beat(3360), (2, 0, 0))
+        self.assertEqual(tempo_map.bar_start(2), 3360)
+
+    def test_scan_title_only(self) -> None:
+        info = PMID.scan_metadata(Path(MID_FILENAME), items=("title",))
+        self.assertEqual(info, {"title": "example title"})
+
 
 if __name__ == "__main__":
     unittest.main()
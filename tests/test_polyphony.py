@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""unittest libs/sublibs/polyphony.py"""
+
+import unittest
+from pathlib import Path
+
+from audioworkstation.libs.sublibs import paramsmid as PMID
+from audioworkstation.libs.sublibs import polyphony as PP
+from audioworkstation.libs.sublibs import csv2mid as C2M
+
+
+CSV_FILENAME = "src/audioworkstation/middata/example.csv"
+MID_FILENAME = "mid/example.mid"
+
+
+def event(tick: int, status: int, channel: int, data1: int, data2: int) -> tuple:
+    return PMID.SmfEvent(tick, 0, status, channel, data1, data2, b"")
+
+
+class TestPolyphony(unittest.TestCase):
+    def setUp(self) -> None:
+        C2M.generate(csvfile=CSV_FILENAME, midifile=MID_FILENAME)
+        return super().setUp()
+
+    def test_profile(self) -> None:
+        profile = PP.profile(Path(MID_FILENAME))
+        self.assertEqual(profile.channel_peak_notes[:3], [1, 1, 0])
+        self.assertEqual(profile.peak_notes, 2)
+        self.assertEqual(profile.peak_sounding, 2)
+        self.assertEqual(profile.notes_per_second, [0, 0, 4, 4])
+
+    def test_sustain_pedal(self) -> None:
+        events = [
+            event(0, 0xB0, 0, 0x40, 127),
+            event(0, 0x90, 0, 60, 64),
+            event(480, 0x80, 0, 60, 0),
+            event(480, 0x90, 0, 64, 64),
+            event(960, 0x90, 0, 64, 0),
+            event(960, 0x90, 0, 67, 64),
+            event(1440, 0xB0, 0, 0x40, 0),
+            event(1920, 0x80, 0, 67, 0),
+        ]
+        profile = PP.analyze(events, PMID.TempoMap(480, []))
+        self.assertEqual(profile.channel_peak_notes[0], 1)
+        self.assertEqual(profile.channel_peak_sounding[0], 3)
+        self.assertEqual(profile.channel_peak_sustained[0], 2)
+        self.assertEqual(profile.notes_per_second, [2, 1])
+
+    def test_presets(self) -> None:
+        events = [
+            event(0, 0xC0, 0, 5, 0),
+            event(0, 0x90, 0, 60, 64),
+            event(0, 0x90, 9, 36, 64),
+            event(480, 0xB0, 1, 0x00, 8),
+            event(480, 0xC0, 1, 5, 0),
+            event(480, 0xC0, 2, 40, 0),  # no notes
+            event(480, 0x90, 1, 60, 64),
+            event(960, 0xC0, 0, 6, 0),
+            event(960, 0x90, 0, 62, 0),  # note off
+            event(1440, 0x90, 0, 64, 64),
+        ]
+        profile = PP.analyze(events, PMID.TempoMap(480, []))
+        self.assertEqual(profile.presets, [(0, 5), (128, 0), (8, 5), (0, 6)])
+
+    def test_synth_settings(self) -> None:
+        profile = PP.PolyphonyProfile(peak_sounding=100)
+        self.assertEqual(
+            profile.synth_settings(cores=2),
+            {"synth.polyphony": 256, "synth.cpu-cores": 2},
+        )
+        profile = PP.PolyphonyProfile(peak_sounding=2)
+        self.assertEqual(
+            profile.synth_settings(cores=2),
+            {"synth.polyphony": 32, "synth.cpu-cores": 1},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()